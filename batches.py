@@ -0,0 +1,118 @@
+"""Batch index: per-batch fill, capacity and revenue with fast date-overlap lookup.
+
+The occupancy and sales workbooks of a location both describe batches by (Category, Site, Group, Batch start
+date, Batch end date). The sales and occupancy sides are joined once per data
+version into one row per batch, and the batches are kept sorted by start date
+so that "which batches overlap [start, end]" is two binary searches plus the
+matches, however many years of batches accumulate.
+"""
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import metrics
+import schema
+
+BATCH_KEYS = ["Category", "Site", "Group", "Batch start date", "Batch end date"]
+SITE_BATCH_KEYS = ["Category", "Site", "Batch start date", "Batch end date"]
+
+
+def _site_batch_groups(df):
+    groups = df.assign(Group=df["Group"].astype(object)).groupby(SITE_BATCH_KEYS, observed=True)["Group"]
+    return groups.apply(lambda group: frozenset(group.dropna()))
+
+
+def _join_group_labels(occupancy_df, sales_df):
+    """Group label to join each site batch under, for batches that cannot be joined per Group.
+
+    The occupancy sheet often leaves Group empty for a site-wide batch, or
+    books two groups as one ("Ganesha and Hanuman"), while the sales sheet
+    names each student's group. Groups are only matched one to one when every
+    sales group of the batch also appears on the occupancy side; otherwise
+    the whole site batch is joined under the occupancy label.
+    """
+    groups = pd.concat(
+        [_site_batch_groups(occupancy_df).rename("occupancy"), _site_batch_groups(sales_df).rename("sales")],
+        axis=1,
+    )
+    empty = frozenset()
+    occupancy = groups["occupancy"].map(lambda value: value if isinstance(value, frozenset) else empty)
+    sales = groups["sales"].map(lambda value: value if isinstance(value, frozenset) else empty)
+    per_group = [bool(o) and s <= o for o, s in zip(occupancy, sales)]
+    labels = occupancy[[not flag for flag in per_group]].map(lambda o: " / ".join(sorted(o)) or np.nan)
+    return labels.rename("join_group").reset_index()
+
+
+@metrics.timed
+def join_batches(occupancy_df, sales_df):
+    """One row per batch with occupancy measures and sales revenue side by side."""
+    # Category and Site are categoricals with different categories on each side
+    text_keys = {"Category": object, "Site": object}
+    labels = _join_group_labels(occupancy_df, sales_df).astype(text_keys)
+
+    def with_join_group(df):
+        keys = df[SITE_BATCH_KEYS].astype(text_keys)
+        merged = keys.merge(labels.assign(relabel=True), how="left", on=SITE_BATCH_KEYS)
+        relabel = merged["relabel"].notna().to_numpy()
+        group = df["Group"].astype(object).where(~relabel, merged["join_group"].to_numpy())
+        return df.assign(Group=group)
+
+    occupancy = with_join_group(occupancy_df)
+    sales = with_join_group(sales_df[BATCH_KEYS + ["Named", "PAID STATUS", "PAID", "TOTAL AMOUNT", "BALANCE"]])
+    sales = sales.assign(bookings=schema.booked(sales).astype("int64"))
+
+    occupancy_totals = occupancy.groupby(BATCH_KEYS, dropna=False, observed=True)[["Capacity", "Fill", "Available"]].sum()
+    sales_totals = sales.groupby(BATCH_KEYS, dropna=False, observed=True).agg(
+        bookings=("bookings", "sum"),
+        PAID=("PAID", "sum"),
+        total_amount=("TOTAL AMOUNT", "sum"),
+        balance=("BALANCE", "sum"),
+    )
+    batches = occupancy_totals.join(sales_totals, how="outer").reset_index()
+    batches["Utilisation"] = batches["Fill"] / batches["Capacity"].where(batches["Capacity"] > 0)
+    return batches
+
+
+class BatchIndex:
+    """Batches sorted by start date, with overlap queries in O(log n + matches)."""
+
+    def __init__(self, batches):
+        # A batch without both dates cannot be placed in time; one NaT would
+        # also make max_duration NaT and every overlap query empty
+        batches = batches.dropna(subset=["Batch start date", "Batch end date"])
+        self.batches = batches.sort_values(["Batch start date", "Batch end date"], kind="stable").reset_index(drop=True)
+        self.starts = self.batches["Batch start date"].to_numpy(dtype="datetime64[ns]")
+        self.ends = self.batches["Batch end date"].to_numpy(dtype="datetime64[ns]")
+        durations = self.ends - self.starts
+        self.max_duration = durations.max() if len(durations) else np.timedelta64(0, "ns")
+
+    def overlapping(self, start, end, category=None):
+        """Batches that run on at least one day of [start, end]."""
+        start = np.datetime64(pd.Timestamp(start), "ns")
+        end = np.datetime64(pd.Timestamp(end), "ns")
+        # A batch overlapping [start, end] starts no later than end and no
+        # earlier than start - max_duration, a contiguous slice of the sort
+        lo = np.searchsorted(self.starts, start - self.max_duration, side="left")
+        hi = np.searchsorted(self.starts, end, side="right")
+        candidates = self.batches.iloc[lo:hi]
+        matches = candidates[self.ends[lo:hi] >= start]
+        if category is not None:
+            matches = matches[matches["Category"] == category]
+        return matches
+
+    def date_range(self):
+        if not len(self.batches):
+            return None, None
+        return pd.Timestamp(self.starts[0]), pd.Timestamp(self.ends.max())
+
+
+def get_batch_index(location="Bali"):
+    """The BatchIndex of the current tables of ``location``, built once per data version."""
+    names = data_loader.booking_sources(location)
+    return data_loader.cached(
+        ("batches", location),
+        data_loader.data_version(names),
+        lambda: BatchIndex(join_batches(*map(data_loader.load_report_table, names))),
+        ttl=None,
+    )
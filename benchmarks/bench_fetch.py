@@ -0,0 +1,129 @@
+"""Remote-load benchmark against a local stand-in for the GitHub raw server.
+
+Serves the repository's workbooks over HTTP/1.1 (with ETag and Last-Modified)
+from a local thread, points ``data_loader`` at it, and compares
+``pd.read_excel(url)`` per workbook with the pooled, conditional fetch layer:
+a cold fetch (200), and a revalidation of unchanged files (304). Usage::
+
+    python benchmarks/bench_fetch.py [--repeat 5]
+"""
+
+import argparse
+import email.utils
+import http.server
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TABLES = ("bali_occupancy", "bali_sales")
+
+
+class StandInHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with keep-alive, ETag/If-None-Match and request counters."""
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    statuses = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=ROOT, **kwargs)
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def send_response(self, code, message=None):
+        type(self).statuses.append(int(code))
+        super().send_response(code, message)
+
+    def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", email.utils.formatdate(usegmt=True))
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = serve()
+    workdir = tempfile.mkdtemp(prefix="sales_report_fetch_")
+    # Nothing on disk, so every source resolves to the stand-in server
+    os.environ["SALES_REPORT_DATA_DIR"] = os.path.join(workdir, "empty")
+    os.environ["SALES_REPORT_REMOTE_URL"] = f"http://127.0.0.1:{server.server_port}/"
+    os.environ["SALES_REPORT_FETCH_DIR"] = os.path.join(workdir, "fetch")
+    os.environ["SALES_REPORT_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+
+    import pandas as pd
+
+    import data_loader
+    import fetch
+
+    urls = [data_loader.resolve_source(name) for name in TABLES]
+
+    StandInHandler.connections = 0
+    baseline = timed(lambda: [pd.read_excel(url) for url in urls], args.repeat)
+    baseline_connections = StandInHandler.connections / args.repeat
+
+    StandInHandler.connections = 0
+    StandInHandler.statuses = []
+    start = time.perf_counter()
+    fetch.fetch_all(urls, force=True)
+    cold = time.perf_counter() - start
+    cold_statuses = sorted(StandInHandler.statuses)
+
+    StandInHandler.statuses = []
+    revalidate = timed(lambda: fetch.fetch_all(urls, force=True), args.repeat)
+    revalidate_statuses = sorted(set(StandInHandler.statuses))
+
+    print(f"{'mode':<28}{'seconds':>10}  notes")
+    print(f"{'pd.read_excel(url)':<28}{baseline:>10.4f}  {baseline_connections:.0f} connections per load, full download + parse")
+    print(f"{'fetch cold':<28}{cold:>10.4f}  statuses {cold_statuses}")
+    print(f"{'fetch revalidate':<28}{revalidate:>10.4f}  statuses {revalidate_statuses}, no download, no parse")
+    print(f"connections opened by the fetch layer: {StandInHandler.connections}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
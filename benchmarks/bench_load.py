@@ -0,0 +1,105 @@
+"""Cold-load benchmark: ``pd.read_excel`` versus the Parquet snapshots.
+
+Every measurement runs in a fresh interpreter so the timings are true cold
+starts and peak RSS is not polluted by earlier runs. Usage::
+
+    python benchmarks/bench_load.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TABLES = ("bali_occupancy", "bali_sales")
+SOURCES = {
+    "bali_occupancy": "Bali data/bali_occupancy.xlsx",
+    "bali_sales": "Bali data/bali_sales.xlsx",
+}
+MODES = ("excel", "snapshot")
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(mode):
+    # Each mode imports only what its own load path needs
+    if mode == "excel":
+        import pandas as pd
+
+        def load(name):
+            return pd.read_excel(os.path.join(ROOT, SOURCES[name]))
+    else:
+        import snapshot
+
+        load = snapshot.read_snapshot
+
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    frames = [load(name) for name in TABLES]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "rows": sum(len(df) for df in frames),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def measure(mode, repeat):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    import data_loader
+
+    # Make sure the snapshots exist and are fresh before timing them
+    for name in TABLES:
+        data_loader.read_workbook(name)
+
+    print(f"{'mode':<10}{'median s':>10}{'min s':>10}{'peak RSS MB':>14}{'load RSS MB':>14}")
+    # "load RSS" is the peak RSS minus the RSS after imports, i.e. what the load itself costs
+    for mode in MODES:
+        results = measure(mode, args.repeat)
+        seconds = [r["seconds"] for r in results]
+        peak = statistics.median(r["peak_rss_mb"] for r in results)
+        delta = statistics.median(r["peak_rss_mb"] - r["baseline_rss_mb"] for r in results)
+        print(f"{mode:<10}{statistics.median(seconds):>10.3f}{min(seconds):>10.3f}{peak:>14.1f}{delta:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Memory footprint of the report tables.
+
+Compares, per table, the frames as returned by ``pd.read_excel``, the
+normalised full tables (``data_loader.load_table``) and the report tables
+(``data_loader.load_report_table``: projected, without personal details).
+Then measures, in a fresh interpreter per layout, what loading every table
+adds to the RSS of a server process, on the tables of ``synthetic.py`` at
+``--scale`` times the current size. Usage::
+
+    python benchmarks/bench_memory.py [--scale 100] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_load import current_rss_mb  # noqa: E402
+
+TABLES = ("bali_occupancy", "bali_sales", "ryp_200hr", "ryp_300hr")
+LAYOUTS = ("full", "report")
+
+
+def run_child(layout):
+    import data_loader
+    import schema
+
+    load = data_loader.load_table if layout == "full" else data_loader.load_report_table
+    baseline_rss = current_rss_mb()
+    frames = [load(name) for name in TABLES]
+    print(json.dumps({
+        "rss_mb": current_rss_mb() - baseline_rss,
+        "frame_mb": sum(schema.memory_usage_mb(df) for df in frames),
+    }))
+
+
+def frame_sizes():
+    import pandas as pd
+
+    import data_loader
+    import schema
+
+    print(f"{'table':<16}{'read_excel MB':>15}{'full MB':>10}{'report MB':>11}{'saved':>8}")
+    for name in TABLES:
+        reader = data_loader.source_reader(name)
+        path = data_loader.local_source(name)
+        raw = reader(path) if reader else pd.read_excel(path)
+        before = schema.memory_usage_mb(raw)
+        full = schema.memory_usage_mb(data_loader.load_table(name))
+        report = schema.memory_usage_mb(data_loader.load_report_table(name))
+        print(f"{name:<16}{before:>15.3f}{full:>10.3f}{report:>11.3f}{1 - report / before:>8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=LAYOUTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    frame_sizes()
+
+    import synthetic
+
+    tables = synthetic.generate(args.scale, TABLES)
+    rows = sum(len(df) for df in tables.values())
+    with tempfile.TemporaryDirectory(prefix="sales_report_bench_") as workdir:
+        env = dict(
+            os.environ,
+            SALES_REPORT_DATA_DIR=os.path.join(workdir, "data"),
+            SALES_REPORT_SNAPSHOT_DIR=os.path.join(workdir, "snapshots"),
+        )
+        synthetic.install(tables, env["SALES_REPORT_DATA_DIR"], env["SALES_REPORT_SNAPSHOT_DIR"])
+        print(f"\n{args.scale}x data, {rows} rows")
+        print(f"{'layout':<10}{'process RSS MB':>16}{'frame MB':>10}")
+        for layout in LAYOUTS:
+            results = []
+            for _ in range(args.repeat):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", layout],
+                    check=True, capture_output=True, text=True, env=env,
+                ).stdout
+                results.append(json.loads(output.strip().splitlines()[-1]))
+            rss = statistics.median(r["rss_mb"] for r in results)
+            print(f"{layout:<10}{rss:>16.1f}{results[0]['frame_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Report-function benchmark on synthetic data at several multiples of today's size.
+
+For every scale the tables of ``synthetic.py`` are installed as snapshots in a
+temporary data directory and measured in a fresh interpreter:
+
+* cold builds of the shared aggregates (cube, batch index, SQL database, RYP)
+* latency of each report function over every Year/Month filter
+* reruns of the whole app on the Overview page (Streamlit ``AppTest``)
+* peak RSS
+
+Results go to a JSON file (one per commit by default) for comparison across
+commits. Usage::
+
+    python benchmarks/bench_reports.py [--scales 10,100,1000] [--iterations 200]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_load import peak_rss_mb  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PERCENTILES = (50, 95, 99)
+
+
+def latency_stats(seconds):
+    milliseconds = np.asarray(seconds) * 1000
+    stats = {f"p{p}_ms": float(np.percentile(milliseconds, p)) for p in PERCENTILES}
+    stats.update(n=len(milliseconds), mean_ms=float(milliseconds.mean()))
+    return stats
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def report_functions():
+    import reports
+
+    def period(category, year, month):
+        start, end = reports.get_period(year, month)
+        return reports.get_batches(category, start, end)
+
+    return {
+        "get_sales_summary_count_amount_paid_and_occupancy_mean":
+            reports.get_sales_summary_count_amount_paid_and_occupancy_mean,
+        "get_fill_counts[Site]": lambda c, y, m: reports.get_fill_counts(c, y, m, group_by="Site"),
+        "get_fill_counts[Room]": lambda c, y, m: reports.get_fill_counts(c, y, m, group_by="Room"),
+        "get_fill_counts[Month]": lambda c, y, m: reports.get_fill_counts(c, y, group_by="Month"),
+        "get_sorted_months_for_year": lambda c, y, m: reports.get_sorted_months_for_year(y),
+        "get_location_table": reports.get_location_table,
+        "get_utilisation_over_time": lambda c, y, m: reports.get_utilisation_over_time(c, y),
+        "get_batches": period,
+        "get_revenue_by_payment_channel": reports.get_revenue_by_payment_channel,
+        "StudentOverview.summary": lambda c, y, m: reports.StudentOverview(c, y, m).summary,
+    }
+
+
+def run_child(iterations, renders):
+    import cube
+    import query
+    import reports
+    from batches import get_batch_index
+    from data_loader import student_sources
+    from ryp import get_student_database
+
+    cold = {
+        "cube_s": timed(cube.get_cube),
+        "batch_index_s": timed(get_batch_index),
+        "students_s": timed(lambda: [get_student_database(program) for program in student_sources("RYP")]),
+        "sql_s": timed(query.get_database),
+    }
+    months = reports.months_by_year()
+    filters = [("All", None)] + [(year, month) for year in months for month in months[year]]
+    categories = ("200HR", "300HR")
+
+    functions = {}
+    for name, function in report_functions().items():
+        seconds = []
+        while len(seconds) < iterations:
+            for category in categories:
+                for year, month in filters:
+                    seconds.append(timed(lambda: function(category, year, month)))
+        functions[name] = latency_stats(seconds[:iterations])
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    first_render = timed(app.run)
+    seconds = []
+    for year, month in (filters[1:] * renders)[:renders]:
+        app.selectbox[0].set_value(year)
+        app.run()
+        app.selectbox[1].set_value(month)
+        seconds.append(timed(app.run))
+    print(json.dumps({
+        "filters": len(filters),
+        "cold": cold,
+        "functions": functions,
+        "overview_render": {"first_s": first_render, **latency_stats(seconds)},
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(scale, iterations, renders):
+    import synthetic
+
+    tables = synthetic.generate(scale)
+    with tempfile.TemporaryDirectory(prefix="sales_report_bench_") as workdir:
+        env = dict(
+            os.environ,
+            SALES_REPORT_DATA_DIR=os.path.join(workdir, "data"),
+            SALES_REPORT_SNAPSHOT_DIR=os.path.join(workdir, "snapshots"),
+            SALES_REPORT_STORE=os.path.join(workdir, "no_store.pickle"),
+            # No background refresh overlapping the timed renders
+            SALES_REPORT_REFRESH_INTERVAL="0",
+        )
+        synthetic.install(tables, env["SALES_REPORT_DATA_DIR"], env["SALES_REPORT_SNAPSHOT_DIR"])
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--iterations", str(iterations), "--renders", str(renders)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["rows"] = {name: len(df) for name, df in tables.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="10,100,1000", help="comma-separated multiples of today's data")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per report function")
+    parser.add_argument("--renders", type=int, default=20, help="Overview reruns per scale")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/reports-<commit>.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.iterations, args.renders)
+        return
+
+    import pandas as pd
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "scales": {},
+    }
+    for scale in (int(value) for value in args.scales.split(",")):
+        result = measure(scale, args.iterations, args.renders)
+        results["scales"][str(scale)] = result
+        render = result["overview_render"]
+        print(f"x{scale}: {sum(result['rows'].values())} rows, cube {result['cold']['cube_s']:.2f}s, "
+              f"Overview p50 {render['p50_ms']:.0f} ms / p95 {render['p95_ms']:.0f} ms, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB")
+        for name, stats in result["functions"].items():
+            print(f"    {name:<56}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"reports-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=1)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cold-start benchmark: import time and time to first render of the app.
+
+Every measurement runs in a fresh interpreter, with the snapshots already
+built (what a new worker sees after the first deploy). ``import`` times the
+imports of ``app.py`` and lists which optional heavy modules they pulled in;
+``first_render`` times the first run of ``app.py`` through Streamlit's
+``AppTest`` (the default page, data loading included). Usage::
+
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("import", "first_render")
+
+# Heavy modules: the data stack every page needs (pandas, numpy, pyarrow for the
+# snapshots), then modules only some pages or tools need
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "matplotlib", "openpyxl", "plotly.express", "requests", "sqlite3")
+
+
+def run_child(mode):
+    if mode == "import":
+        start = time.perf_counter()
+        import streamlit  # noqa: F401
+
+        import metrics  # noqa: F401
+        import precompute  # noqa: F401
+        import reports  # noqa: F401
+        import views  # noqa: F401
+
+        elapsed = time.perf_counter() - start
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(json.dumps({"seconds": elapsed, "loaded": loaded}))
+        return
+
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300).run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise SystemExit(app.exception[0].message)
+    print(json.dumps({"seconds": elapsed, "loaded": [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    # Build the snapshots once so every child starts from the same state
+    subprocess.run([sys.executable, "-c", "import ingest; ingest.ingest()"], check=True, cwd=ROOT)
+
+    # No background refresh overlapping the first render
+    env = dict(os.environ, SALES_REPORT_REFRESH_INTERVAL="0")
+    print(f"{'mode':<14}{'median s':>10}{'min s':>8}  heavy modules loaded")
+    for mode in MODES:
+        results = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode],
+                check=True, capture_output=True, text=True, cwd=ROOT, env=env,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        seconds = [r["seconds"] for r in results]
+        print(f"{mode:<14}{statistics.median(seconds):>10.3f}{min(seconds):>8.3f}  {', '.join(results[0]['loaded'])}")
+
+
+if __name__ == "__main__":
+    main()
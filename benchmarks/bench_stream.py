@@ -0,0 +1,122 @@
+"""Streaming-ingest benchmark on a synthetically enlarged copy of the sales sheet.
+
+The rows of ``bali_sales.xlsx`` are repeated (with fresh ``No`` keys) into a
+temporary workbook of ``--rows`` rows, which is then read in a fresh
+interpreter per mode:
+
+* ``read_excel``: ``pd.read_excel`` then ``schema.coerce`` (the old path)
+* ``stream``: ``workbook.read_table``, every column
+* ``stream_projected``: ``workbook.read_table`` of ``schema.REPORT_COLUMNS``
+
+Usage::
+
+    python benchmarks/bench_stream.py [--rows 120000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_load import current_rss_mb, peak_rss_mb  # noqa: E402
+
+TABLE = "bali_sales"
+SOURCE = os.path.join(ROOT, "Bali data", "bali_sales.xlsx")
+MODES = ("read_excel", "stream", "stream_projected")
+
+
+def enlarge(path, rows):
+    """Write a copy of the sales sheet repeated up to ``rows`` data rows."""
+    from openpyxl import Workbook, load_workbook
+
+    source = load_workbook(SOURCE, read_only=True, data_only=True)
+    header, *data = list(source.worksheets[0].iter_rows(values_only=True))
+    source.close()
+    data = [row for row in data if any(value is not None for value in row)]
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet()
+    sheet.append(header)
+    for number in range(rows):
+        row = list(data[number % len(data)])
+        row[0] = str(number + 1)
+        sheet.append(row)
+    book.save(path)
+
+
+def run_child(mode, path):
+    import pandas as pd
+
+    import schema
+    import workbook
+
+    if mode == "read_excel":
+        def load():
+            return schema.coerce(pd.read_excel(path), TABLE)
+    elif mode == "stream":
+        def load():
+            return workbook.read_table(path, TABLE)
+    else:
+        def load():
+            return workbook.read_table(path, TABLE, schema.report_columns(TABLE))
+
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "frame_mb": df.memory_usage(deep=True).sum() / (1024 * 1024),
+    }))
+
+
+def measure(mode, path, repeat):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--path", path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=120_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bali_sales_large.xlsx")
+        enlarge(path, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(path) / (1024 * 1024):.1f} MB xlsx")
+        print(f"{'mode':<18}{'median s':>10}{'columns':>9}{'load RSS MB':>14}{'frame MB':>10}")
+        # "load RSS" is the peak RSS minus the RSS after imports, i.e. what the load itself costs
+        for mode in MODES:
+            results = measure(mode, path, args.repeat)
+            seconds = statistics.median(r["seconds"] for r in results)
+            delta = statistics.median(r["peak_rss_mb"] - r["baseline_rss_mb"] for r in results)
+            frame = results[0]["frame_mb"]
+            print(f"{mode:<18}{seconds:>10.3f}{results[0]['columns']:>9}{delta:>14.1f}{frame:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Synthetic report tables at a multiple of the current data size.
+
+The normalised Bali and RYP tables are repeated ``factor`` times. Every copy
+is moved by a whole number of years (within ``YEAR_SPAN`` years around the
+real data), gets fresh ``No`` keys and slightly varied amounts, so the tables
+keep their columns, dtypes and categories while growing both in history and
+in rows per batch.
+
+``install`` writes the tables as the Parquet snapshots of empty placeholder
+workbooks, so the app and the report functions load them through the normal
+``data_loader`` path.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+YEAR_SPAN = 20
+# Table kind -> amount columns varied per copy
+AMOUNT_COLUMNS = {
+    "sales": ("PRICE", "TOTAL AMOUNT", "PAID", "BALANCE"),
+    "students": ("Total Payable", "Total paid", "Still to pay"),
+}
+
+
+def _shift_years(dates, years):
+    values = dates.to_numpy(dtype="datetime64[ns]")
+    months = values.astype("datetime64[M]")
+    shifted = (months + (12 * years).astype("timedelta64[M]")).astype("datetime64[ns]") + (values - months)
+    return pd.Series(shifted, index=dates.index)
+
+
+def scale_table(df, name, factor, seed=0):
+    """``df`` (a normalised table) repeated ``factor`` times across ``YEAR_SPAN`` years."""
+    import schema
+
+    rng = np.random.default_rng(seed)
+    rows = len(df)
+    scaled = df.take(np.tile(np.arange(rows), factor)).reset_index(drop=True)
+    span = min(factor, YEAR_SPAN)
+    years = np.repeat(np.arange(factor) % span - span // 2, rows)
+
+    scaled["Year"] = (scaled["Year"] + years).astype(df["Year"].dtype)
+    for column in scaled.columns:
+        if pd.api.types.is_datetime64_any_dtype(scaled[column]):
+            scaled[column] = _shift_years(scaled[column], years)
+    if "No" in scaled:
+        scaled["No"] = pd.array(np.arange(1, len(scaled) + 1), dtype=df["No"].dtype)
+    for column in AMOUNT_COLUMNS.get(schema.table_kind(name), ()):
+        if column in scaled:
+            scaled[column] = (scaled[column] * rng.uniform(0.8, 1.2, len(scaled))).round(2)
+    return scaled
+
+
+def generate(factor, names=None, seed=0):
+    """{table name: scaled table} built from the current data."""
+    import data_loader
+
+    names = names or tuple(data_loader.SOURCES)
+    return {name: scale_table(data_loader.load_table(name), name, factor, seed) for name in names}
+
+
+def install(tables, data_dir, snapshot_dir):
+    """Make ``tables`` the data of an app run with ``SALES_REPORT_DATA_DIR=data_dir``
+    and ``SALES_REPORT_SNAPSHOT_DIR=snapshot_dir`` (usually in another process).
+    """
+    import data_loader
+    import snapshot
+
+    saved = data_loader.DATA_DIR, snapshot.SNAPSHOT_DIR
+    data_loader.DATA_DIR, snapshot.SNAPSHOT_DIR = data_dir, snapshot_dir
+    try:
+        for name, df in tables.items():
+            path = os.path.join(data_dir, data_loader.SOURCES[name])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+            snapshot.write_snapshot(name, df, data_loader.source_version(name))
+    finally:
+        data_loader.DATA_DIR, snapshot.SNAPSHOT_DIR = saved
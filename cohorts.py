@@ -0,0 +1,157 @@
+"""Links between the 200HR students and the 300HR enrolments of a location.
+
+Nothing in the two student databases refers to the other, so students are
+matched on normalised contact details: every e-mail address of the cell
+(some hold two), the last digits of the WA number and the name (words in any
+order). All keys of both programs go into one long key table each, and the
+two are joined on the key with a hash join: the cost grows linearly with the
+number of students instead of comparing every pair.
+
+A 300HR enrolment is linked to at most one 200HR student, matched on its
+strongest key (``KEY_KINDS`` order), among the students whose 200HR batch did
+not start after the 300HR batch. The personal details are only read while
+the links are built; the ``Cohorts`` kept in the cache hold row positions and
+amounts only.
+"""
+
+import pandas as pd
+
+import data_loader
+import schema
+
+# (kind, private column), strongest match first
+KEY_KINDS = (("email", "Email"), ("phone", "WA number"), ("name", "Name"))
+
+# A key shared by more students than this within one program (a common name,
+# an agency's address) identifies nobody and is not matched on. This also
+# bounds the size of the join.
+MAX_STUDENTS_PER_KEY = 2
+
+# Phone numbers are compared on their last digits, so "+49 1573 9286088" and
+# "015739286088" match; shorter numbers are too ambiguous to match on
+PHONE_DIGITS = 9
+
+FIRST_PROGRAM, SECOND_PROGRAM = "200HR", "300HR"
+
+
+def email_keys(values):
+    parts = values.astype("string").str.lower().str.split(r"[\s/,;]+").explode()
+    return parts[parts.str.contains("@", na=False)]
+
+
+def phone_keys(values):
+    digits = values.astype("string").str.replace(r"\D", "", regex=True)
+    return digits[digits.str.len() >= PHONE_DIGITS].str[-PHONE_DIGITS:]
+
+
+def name_keys(values):
+    words = values.astype("string").str.lower().str.replace(r"[^\w\s]|\d|_", " ", regex=True).str.split()
+    words = words.dropna()
+    return words[words.map(len) > 1].map(lambda tokens: " ".join(sorted(tokens)))
+
+
+NORMALISERS = {"email": email_keys, "phone": phone_keys, "name": name_keys}
+
+
+def student_keys(private):
+    """Long table of (row, key, rank): the match keys of every student of ``private``."""
+    parts = []
+    for rank, (kind, column) in enumerate(KEY_KINDS):
+        if column not in private:
+            continue
+        keys = NORMALISERS[kind](private[column]).dropna()
+        parts.append(pd.DataFrame({"row": keys.index, "key": kind + ":" + keys.to_numpy(dtype=object), "rank": rank}))
+    keys = pd.concat(parts, ignore_index=True).drop_duplicates(["row", "key"])
+    return keys[keys.groupby("key")["row"].transform("size") <= MAX_STUDENTS_PER_KEY]
+
+
+def link_students(first_private, second_private, first_starts, second_starts):
+    """(row in first, row in second, kind matched on) per linked enrolment of the second program.
+
+    ``*_starts`` are the batch start dates of each row, aligned with the private tables.
+    """
+    pairs = student_keys(first_private).merge(
+        student_keys(second_private), on=["key", "rank"], suffixes=("_first", "_second")
+    )
+    pairs["start_first"] = first_starts.to_numpy()[pairs["row_first"].to_numpy()]
+    start_second = second_starts.to_numpy()[pairs["row_second"].to_numpy()]
+    # The 300HR batch follows the 200HR one (unknown dates do not rule a match out)
+    pairs = pairs[~(pairs["start_first"].to_numpy() > start_second)]
+    best = pairs.sort_values(["row_second", "rank", "start_first"], ascending=[True, True, False], kind="stable")
+    best = best.drop_duplicates("row_second").reset_index(drop=True)
+    return best[["row_first", "row_second"]].assign(matched_on=[KEY_KINDS[rank][0] for rank in best["rank"]])
+
+
+class Cohorts:
+    """200HR students with the 300HR enrolments linked to them, by 200HR cohort."""
+
+    def __init__(self, first, second, links):
+        linked = links.assign(
+            paid=second["Total paid"].to_numpy()[links["row_second"].to_numpy()],
+            payable=second["Total Payable"].to_numpy()[links["row_second"].to_numpy()],
+        ).groupby("row_first")[["paid", "payable"]].sum()
+        self.links = links
+        self.students = pd.DataFrame({
+            "Year": first["Year"],
+            "Month": first["Month"],
+            "Intends 300HR": first["Continues to 300HR"],
+            "Converted": first.index.isin(linked.index),
+            "300HR paid": linked["paid"].reindex(first.index, fill_value=0.0),
+            "300HR payable": linked["payable"].reindex(first.index, fill_value=0.0),
+        })
+
+    def conversion(self, selected_year="All", selected_month=None):
+        """Return (200HR students, converted, conversion rate, 300HR paid per converted student)."""
+        students = schema.filter_period(self.students, selected_year, selected_month)
+        converted = int(students["Converted"].sum())
+        rate = converted / len(students) if len(students) else float("nan")
+        paid = float(students["300HR paid"].sum()) / converted if converted else float("nan")
+        return len(students), converted, rate, paid
+
+    def by_cohort(self, selected_year="All"):
+        """Students, stated intentions, conversions, conversion rate and 300HR revenue per 200HR cohort."""
+        students = schema.filter_period(self.students, selected_year)
+        cohorts = students.groupby(["Year", "Month"], observed=True, sort=True).agg(
+            students=("Converted", "size"),
+            intended=("Intends 300HR", "sum"),
+            converted=("Converted", "sum"),
+            paid=("300HR paid", "sum"),
+        )
+        cohorts["rate"] = cohorts["converted"] / cohorts["students"]
+        cohorts["paid_per_converted"] = cohorts["paid"] / cohorts["converted"].where(cohorts["converted"] > 0)
+        cohorts.index = [f"{month[:3]} {year}" for year, month in cohorts.index]
+        return cohorts.rename_axis("Cohort")
+
+
+def build_cohorts(first_name, second_name):
+    """Cohorts of the two student databases, or None when the private rows of
+    the versions the reports see are no longer on disk."""
+    first = data_loader.load_report_table(first_name)
+    second = data_loader.load_report_table(second_name)
+    # Read for the join only, not through the cache, so no personal details stay
+    # in memory; of the same versions as the report tables, so rows are aligned
+    first_private, second_private = (
+        data_loader.read_workbook(name, schema.private_columns(name), data_loader.source_version(name))
+        for name in (first_name, second_name)
+    )
+    if first_private is None or second_private is None:
+        return None
+    links = link_students(first_private, second_private, first["Batch start date"], second["Batch start date"])
+    return Cohorts(first, second, links)
+
+
+def get_cohorts(location="RYP"):
+    """The Cohorts of ``location``'s student databases, built once per data version."""
+    programs = data_loader.student_sources(location)
+    names = (programs[FIRST_PROGRAM], programs[SECOND_PROGRAM])
+    cohorts = data_loader.cached(
+        ("cohorts", location),
+        data_loader.data_version(names),
+        lambda: build_cohorts(*names),
+        ttl=None,
+    )
+    if cohorts is None:
+        # Those rows are gone from disk: build from the tables as they are now
+        with data_loader.pinned_versions(data_loader.live_versions(names)):
+            return get_cohorts(location)
+    return cohorts
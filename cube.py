@@ -0,0 +1,189 @@
+"""Pre-aggregated report cube.
+
+The Overview page asks the same few questions (bookings, amount paid, mean
+occupancy, Fill by Site/Room/Month) for one Category/Year/Month filter. Instead
+of re-masking the raw tables on every call, the measures are summed once per
+data version at the finest grain the reports use, and every query becomes a
+roll-up over those groups. All measures are sums, so when a table was
+re-ingested incrementally the cube is updated by subtracting the groups of
+the removed rows and adding those of the added ones.
+"""
+
+import pandas as pd
+
+import data_loader
+import metrics
+import schema
+
+OCCUPANCY_GRAIN = ["Category", "Year", "Month", "Site", "Room"]
+SALES_GRAIN = ["Category", "Year", "Month", "Site", "Room"]
+
+
+def build_occupancy_cube(occupancy_df):
+    occupancy = occupancy_df.assign(
+        # Occupancy mean is kept as numerator and denominator so it can be rolled up
+        occupancy_sum=occupancy_df["Occupancy"],
+        occupancy_count=occupancy_df["Occupancy"].notna().astype("int64"),
+    )
+    cube = occupancy.groupby(OCCUPANCY_GRAIN, dropna=False, observed=True, sort=False).agg(
+        Fill=("Fill", "sum"),
+        Capacity=("Capacity", "sum"),
+        Available=("Available", "sum"),
+        occupancy_sum=("occupancy_sum", "sum"),
+        occupancy_count=("occupancy_count", "sum"),
+        rows=("Fill", "size"),
+    )
+    return cube.reset_index().astype({
+        "Fill": "int64",
+        "Capacity": "int64",
+        "Available": "int64",
+        "occupancy_sum": "float64",
+        "occupancy_count": "int64",
+        "rows": "int64",
+    })
+
+
+def build_sales_cube(sales_df):
+    sales = sales_df.assign(
+        Room=sales_df["ROOM TYPE"],
+        bookings=schema.booked(sales_df).astype("int64"),
+    )
+    cube = sales.groupby(SALES_GRAIN, dropna=False, observed=True, sort=False).agg(
+        PAID=("PAID", "sum"),
+        bookings=("bookings", "sum"),
+        rows=("bookings", "size"),
+    )
+    return cube.reset_index().astype({"PAID": "float64", "bookings": "int64", "rows": "int64"})
+
+
+def apply_deltas(cube, build, grain, deltas):
+    """Update a cube built by ``build`` with the ``snapshot.Delta`` chain of its table."""
+    if not deltas:
+        return cube
+    measures = [column for column in cube.columns if column not in grain]
+    parts = [cube]
+    for delta in deltas:
+        parts.append(build(delta.added))
+        removed = build(delta.removed)
+        removed[measures] = -removed[measures]
+        parts.append(removed)
+    combined = pd.concat(parts, ignore_index=True)
+    # Concatenated categoricals with different categories come back as object
+    combined = combined.astype({column: "category" for column in grain if column != "Month" and combined[column].dtype == object})
+    updated = combined.groupby(grain, dropna=False, observed=True, sort=False)[measures].sum().reset_index()
+    # Groups whose rows were all removed disappear, as in a full rebuild
+    return updated[updated["rows"] > 0].reset_index(drop=True).astype(cube[measures].dtypes.to_dict())
+
+
+def build_month_index(*cubes):
+    """Map each year to its months in calendar order, across all ``cubes``."""
+    pairs = pd.concat([cube[["Year", "Month"]] for cube in cubes]).dropna().drop_duplicates()
+    # Month is an ordered categorical, so this sorts by integer month codes
+    pairs = pairs.sort_values(["Year", "Month"])
+    return {int(year): group["Month"].astype(str).tolist() for year, group in pairs.groupby("Year", sort=True)}
+
+
+class ReportCube:
+    """Occupancy and sales measures summed per (Category, Year, Month, Site, Room)."""
+
+    def __init__(self, occupancy, sales):
+        self.occupancy = occupancy
+        self.sales = sales
+        self.months_by_year = build_month_index(occupancy, sales)
+        self.years = list(self.months_by_year)
+
+    @classmethod
+    @metrics.timed(name="cube:build")
+    def from_tables(cls, occupancy_df, sales_df):
+        return cls(build_occupancy_cube(occupancy_df), build_sales_cube(sales_df))
+
+    @metrics.timed(name="cube:update")
+    def updated(self, occupancy_deltas, sales_deltas):
+        """A new cube with the incremental changes of both tables applied."""
+        return ReportCube(
+            apply_deltas(self.occupancy, build_occupancy_cube, OCCUPANCY_GRAIN, occupancy_deltas),
+            apply_deltas(self.sales, build_sales_cube, SALES_GRAIN, sales_deltas),
+        )
+
+    @staticmethod
+    def _slice(cube, category, selected_year="All", selected_month=None):
+        mask = cube["Category"] == category
+        if selected_year != "All":
+            mask &= cube["Year"] == selected_year
+        if selected_month:
+            mask &= cube["Month"] == selected_month
+        return cube[mask]
+
+    def summary(self, category, selected_year="All", selected_month=None):
+        """Return (bookings, total amount paid, mean occupancy) for a filter."""
+        sales = self._slice(self.sales, category, selected_year, selected_month)
+        occupancy = self._slice(self.occupancy, category, selected_year, selected_month)
+        occupancy_count = occupancy["occupancy_count"].sum()
+        occupancy_mean = occupancy["occupancy_sum"].sum() / occupancy_count if occupancy_count else float("nan")
+        return int(sales["bookings"].sum()), float(sales["PAID"].sum()), occupancy_mean
+
+    def fill_counts(self, category, selected_year="All", selected_month=None, group_by="Site"):
+        """Total Fill per ``group_by`` (any column of ``OCCUPANCY_GRAIN``), largest first.
+
+        Ties keep the natural order of the group (calendar order for months).
+        """
+        occupancy = self._slice(self.occupancy, category, selected_year, selected_month)
+        counts = occupancy.groupby(group_by, observed=True, sort=True)["Fill"].sum()
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def location_table(self, category, selected_year="All", selected_month=None):
+        """Capacity, Fill, unsold beds, utilisation and revenue per bed per (Site, Room).
+
+        Both cubes are summed to (Site, Room) in one groupby each and joined
+        once; rooms sold without an occupancy row keep their revenue with
+        empty bed counts.
+        """
+        keys = ["Site", "Room"]
+        occupancy = self._slice(self.occupancy, category, selected_year, selected_month)
+        sales = self._slice(self.sales, category, selected_year, selected_month)
+        beds = occupancy.astype({"Site": object, "Room": object}).groupby(keys)[["Capacity", "Fill", "Available"]].sum()
+        paid = sales.astype({"Site": object, "Room": object}).groupby(keys)["PAID"].sum()
+        table = beds.join(paid, how="outer").reset_index()
+        table["Utilisation"] = table["Fill"] / table["Capacity"].where(table["Capacity"] > 0)
+        table["Revenue per bed"] = table["PAID"] / table["Fill"].where(table["Fill"] > 0)
+        return table
+
+    def utilisation_over_time(self, category, selected_year="All", group_by="Site"):
+        """Fill / Capacity per month (rows, in calendar order) and ``group_by`` value (columns)."""
+        occupancy = self._slice(self.occupancy, category, selected_year)
+        if occupancy.empty:
+            return pd.DataFrame(index=pd.Index([], name="Period"), columns=pd.Index([], name=group_by), dtype=float)
+        totals = occupancy.pivot_table(
+            index=["Year", "Month"], columns=group_by, values=["Fill", "Capacity"],
+            aggfunc="sum", observed=True, sort=True,
+        )
+        utilisation = totals["Fill"] / totals["Capacity"].where(totals["Capacity"] > 0)
+        utilisation.index = [f"{month[:3]} {year}" for year, month in utilisation.index]
+        return utilisation.rename_axis("Period").rename_axis(columns=group_by)
+
+
+def get_cube(location="Bali"):
+    """The cube of the current tables of ``location``, built once per data version.
+
+    When the tables changed through incremental re-ingest, the previous cube
+    is updated with the changed rows instead of being rebuilt.
+    """
+    names = data_loader.booking_sources(location)
+    version = data_loader.data_version(names)
+
+    def update(old_version, cube):
+        deltas = [
+            data_loader.table_deltas(name, old, new)
+            for name, old, new in zip(names, old_version.split("|"), version.split("|"))
+        ]
+        if any(chain is None for chain in deltas):
+            return None
+        return cube.updated(*deltas)
+
+    return data_loader.cached(
+        ("cube", location),
+        version,
+        lambda: ReportCube.from_tables(*map(data_loader.load_report_table, names)),
+        ttl=None,
+        update=update,
+    )
@@ -0,0 +1,406 @@
+"""Process-wide cached access to the report workbooks.
+
+Streamlit re-executes ``app.py`` on every widget change, so the workbooks are
+kept in a module-level cache that is shared by every session of the server
+process. Entries are keyed by source name and content version (mtime and size
+for local files, content digest for fetched ones) and expire after ``DEFAULT_TTL`` seconds or on ``invalidate``.
+
+Once ``refresher.py`` runs, readers no longer check the sources themselves:
+they see the versions it last published, whose tables and aggregates it built
+beforehand, and the refresher swaps in new versions as a whole.
+"""
+
+import dataclasses
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import fetch
+import manifest
+import metrics
+import schema
+import snapshot
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get("SALES_REPORT_DATA_DIR", BASE_DIR)
+REMOTE_BASE_URL = os.environ.get(
+    "SALES_REPORT_REMOTE_URL", "https://raw.githubusercontent.com/antoniusawe/sales-report/main/"
+)
+
+# Table name -> manifest.Source of every workbook, discovered per location directory
+MANIFEST = manifest.load_manifest(DATA_DIR)
+
+# Source name -> path relative to the repository root (same layout on GitHub)
+SOURCES = {name: source.path for name, source in MANIFEST.items()}
+BALI_SOURCES = ("bali_occupancy", "bali_sales")
+
+# Table kinds whose layout the streaming reader cannot read directly:
+# "module.function" taking the workbook path. The module is only imported
+# when such a source is read.
+SOURCE_READERS = {
+    "students": "ryp.read_student_database",
+}
+
+DEFAULT_TTL = float(os.environ.get("SALES_REPORT_CACHE_TTL", 15 * 60))
+
+# How many incremental changes per table are kept for derived caches to replay
+MAX_DELTAS = 8
+
+_cache = {}
+_deltas = {}
+_key_locks = {}
+_lock = threading.Lock()
+_generation = 0
+
+# Source name -> version every reader sees, replaced as a whole by publish();
+# None until the refresher published one, sources are then checked live
+_published = None
+# Versions of the refresh being built on this thread, see pinned_versions()
+_pinned = threading.local()
+# Entries replaced while building a refresh, still served to readers of the
+# published versions until the next refresh starts
+_superseded = {}
+
+
+def booking_sources(location):
+    """(occupancy, sales) source names of ``location``."""
+    kinds = manifest.locations(MANIFEST)[location]
+    return kinds["occupancy"][0], kinds["sales"][0]
+
+
+def student_sources(location):
+    """Program -> student database source name of ``location``."""
+    return {
+        source.program: name
+        for name, source in MANIFEST.items()
+        if source.location == location and source.kind == "students"
+    }
+
+
+def sources_of_kind(kind):
+    """Source names of one table kind, across every location."""
+    return tuple(name for name, source in MANIFEST.items() if source.kind == kind)
+
+
+def is_remote(path):
+    return path.startswith(("http://", "https://"))
+
+
+def resolve_source(name):
+    """Return the local path of a source, or its GitHub URL if not on disk."""
+    relative = SOURCES[name]
+    local_path = os.path.join(DATA_DIR, relative)
+    if os.path.exists(local_path):
+        return local_path
+    return REMOTE_BASE_URL + quote(relative)
+
+
+def local_source(name):
+    """Local path of a source's bytes, fetching (or revalidating) remote ones."""
+    path = resolve_source(name)
+    if is_remote(path):
+        return fetch.fetch(path).path
+    return path
+
+
+def _visible_versions():
+    return getattr(_pinned, "versions", None) or _published
+
+
+def source_version(name):
+    """Version of a source as the reports see it.
+
+    The versions pinned on this thread (a refresh being built), else the ones
+    last published, else the live version of the source.
+    """
+    versions = _visible_versions()
+    if versions is not None and name in versions:
+        return versions[name]
+    return live_source_version(name)
+
+
+def live_source_version(name):
+    """Cheap content version of a source as it is now.
+
+    Local files use mtime and size; remote ones the digest of the fetched
+    bytes, which stays the same as long as the server answers 304.
+    """
+    path = resolve_source(name)
+    if is_remote(path):
+        return fetch.fetch(path).digest[:16]
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def prefetch(names):
+    """Fetch or revalidate the remote ones among ``names`` concurrently.
+
+    Sources with a published or pinned version are left to the refresher.
+    """
+    versions = _visible_versions() or {}
+    urls = [path for path in map(resolve_source, (name for name in names if name not in versions)) if is_remote(path)]
+    if urls:
+        fetch.fetch_all(urls)
+
+
+def live_versions(names):
+    """{name: live version} of ``names``, fetching or revalidating the remote ones first."""
+    urls = [path for path in map(resolve_source, names) if is_remote(path)]
+    if urls:
+        fetch.fetch_all(urls)
+    return {name: live_source_version(name) for name in names}
+
+
+@contextmanager
+def pinned_versions(versions):
+    """Make this thread see ``versions`` ({name: version}), to build a refresh before publishing it."""
+    previous = getattr(_pinned, "versions", None)
+    _pinned.versions = {**(previous or {}), **versions}
+    try:
+        yield
+    finally:
+        _pinned.versions = previous
+
+
+def publish(versions):
+    """Make ``versions`` the ones every reader sees, in one swap."""
+    global _published
+    _published = dict(versions)
+
+
+def drop_superseded():
+    """Forget the entries replaced by the previous refresh; no reader asks for them any more."""
+    with _lock:
+        _superseded.clear()
+
+
+def cached(key, version, builder, ttl=DEFAULT_TTL, update=None):
+    """Return the cached value for ``key`` or build it with ``builder()``.
+
+    The entry is rebuilt when ``version`` differs from the cached one or when
+    it is older than ``ttl`` seconds (``None`` disables expiry). Concurrent
+    callers for the same key wait for a single build instead of repeating it.
+    When the version changed, ``update(old_version, old_value)`` is tried
+    first and may return the new value derived from the old one, or None to
+    fall back to ``builder()``. ``builder()`` returns None when ``version`` can
+    no longer be built; nothing is cached then.
+
+    Entries built for a refresh (``pinned_versions``) are only replaced by the
+    next refresh: a value of another version built outside of it is kept next
+    to them, with the entries that refresh superseded.
+    """
+    global _generation
+
+    entry = _fresh_entry(key, version, ttl)
+    if entry is not None:
+        metrics.count("cache_hits_total", cache=key[0])
+        return entry["value"]
+
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        entry = _fresh_entry(key, version, ttl)
+        if entry is not None:
+            metrics.count("cache_hits_total", cache=key[0])
+            return entry["value"]
+
+        metrics.count("cache_misses_total", cache=key[0])
+        with _lock:
+            stale = _cache.get(key)
+        value = None
+        if update is not None and stale is not None and stale["version"] != version:
+            value = update(stale["version"], stale["value"])
+        if value is None:
+            value = builder()
+        if value is None:
+            return None
+        pinned = bool(getattr(_pinned, "versions", None))
+        with _lock:
+            _generation += 1
+            entry = {
+                "version": version,
+                "loaded_at": time.monotonic(),
+                "generation": _generation,
+                "pinned": pinned,
+                "value": value,
+            }
+            current = _cache.get(key)
+            if current is None or current["version"] == version or not (pinned or current["pinned"]):
+                _cache[key] = entry
+            elif pinned:
+                # Readers keep getting the published value until the swap; after a
+                # failed refresh it is already there, and current is unpublished
+                _superseded.setdefault(key, current)
+                _cache[key] = entry
+            else:
+                # The refresh's entry stays, published or about to be
+                _superseded[key] = entry
+        return value
+
+
+def _fresh_entry(key, version, ttl):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None or entry["version"] != version:
+            entry = _superseded.get(key)
+    if entry is None or entry["version"] != version:
+        return None
+    # Published versions stay valid until the refresher publishes new ones
+    if ttl is not None and _published is None and time.monotonic() - entry["loaded_at"] >= ttl:
+        return None
+    return entry
+
+
+def invalidate(key=None):
+    """Drop one cache entry, or the whole cache when ``key`` is None."""
+    with _lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
+
+
+def _record_delta(name, delta):
+    # Consumers rebuild from report tables, which carry no personal details
+    delta = dataclasses.replace(
+        delta,
+        removed=schema.without_private(delta.removed, name),
+        added=schema.without_private(delta.added, name),
+    )
+    with _lock:
+        deltas = _deltas.setdefault(name, [])
+        deltas.append(delta)
+        del deltas[:-MAX_DELTAS]
+
+
+def table_deltas(name, from_version, to_version):
+    """The ``snapshot.Delta`` chain leading table ``name`` from one version to another.
+
+    Returns an empty list if the versions are equal, and None when the change
+    was not ingested incrementally by this process.
+    """
+    chain = []
+    version = from_version
+    with _lock:
+        deltas = list(_deltas.get(name, ()))
+    while version != to_version:
+        delta = next((delta for delta in deltas if delta.from_version == version), None)
+        if delta is None:
+            return None
+        chain.append(delta)
+        version = delta.to_version
+    return chain
+
+
+def source_reader(name):
+    reader = SOURCE_READERS.get(schema.table_kind(name))
+    if reader is None:
+        return None
+    module_name, function_name = reader.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def read_workbook(name, columns=None, version=None):
+    """Read a source as a typed DataFrame, from its snapshot when up to date.
+
+    Snapshots are only built from the source as it is now, tagged with its
+    live version. ``version`` asks for that version of the rows instead: an
+    earlier one is read from its snapshot while it is still on disk (the
+    published data while a refresh is built), else None is returned.
+    """
+    with metrics.span(f"load:{name}"):
+        df = snapshot.read_version(name, version, columns) if version is not None else None
+        if df is None:
+            path = local_source(name)
+            live = live_source_version(name)
+            if version is not None and version != live:
+                return None
+            df = snapshot.load(
+                name,
+                path,
+                live,
+                columns,
+                source_reader(name),
+                on_delta=lambda delta: _record_delta(name, delta),
+            )
+    metrics.dataframe_gauge(df, table=name, columns="all" if columns is None else str(len(columns)))
+    return df
+
+
+def load_table(name, columns=None, ttl=DEFAULT_TTL):
+    """Load a source workbook as a DataFrame through the process-wide cache.
+
+    ``columns`` restricts the read to a projection of the table. The returned
+    frame is shared between sessions and must not be mutated.
+    """
+    if columns is not None:
+        columns = tuple(columns)
+    return _cached_source(("table", name, columns), name, lambda version: read_workbook(name, columns, version), ttl)
+
+
+def load_report_table(name, ttl=DEFAULT_TTL):
+    """The table as the reports use it: projected to ``schema.REPORT_COLUMNS``
+    and without personal details (``schema.without_private``).
+    """
+
+    def read(version):
+        df = read_workbook(name, schema.report_columns(name), version)
+        return None if df is None else schema.without_private(df, name)
+
+    return _cached_source(("report", name), name, read, ttl)
+
+
+def load_private_table(name, ttl=DEFAULT_TTL):
+    """``(report table, private table)`` of table ``name``, the latter with its
+    ``schema.PRIVATE_COLUMNS`` and read on first drill-down.
+
+    Both are of one source version, so their rows are aligned (same index).
+    """
+    columns = tuple(schema.private_columns(name))
+    version = source_version(name)
+    private = cached(("table", name, columns), version, lambda: read_workbook(name, columns, version), ttl)
+    if private is None:
+        # Those rows are gone from disk: take both tables as they are now
+        with pinned_versions({name: live_source_version(name)}):
+            return load_private_table(name, ttl)
+    return load_report_table(name, ttl), private
+
+
+def _cached_source(key, name, read, ttl):
+    """``read(version)`` of source ``name`` through the cache, at the version the reports see.
+
+    When the rows of that version can no longer be read (a refresh replaced
+    their snapshot before publishing it), they are read as they are now and
+    cached the way that refresh caches them.
+    """
+    version = source_version(name)
+    value = cached(key, version, lambda: read(version), ttl)
+    while value is None:
+        with pinned_versions({name: live_source_version(name)}):
+            version = source_version(name)
+            value = cached(key, version, lambda: read(version), ttl)
+    return value
+
+
+def table_version(name):
+    """Version of the currently cached table, loading it first if needed."""
+    load_report_table(name)
+    return source_version(name)
+
+
+def current_version(names=BALI_SOURCES):
+    """Combined version of several sources as they are now, without loading them."""
+    prefetch(names)
+    return "|".join(source_version(name) for name in names)
+
+
+def data_version(names=BALI_SOURCES):
+    """Combined version of several sources, usable as a downstream cache key."""
+    prefetch(names)
+    # Parsed in this process; the parallel ingest (ingest.py) runs only from
+    # the explicit entry points: the ingest script, precompute.warm_up and the refresher
+    return "|".join(table_version(name) for name in names)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""Export of the rows and aggregates behind a view, as CSV, Parquet or XLSX.
+
+Each export of ``EXPORTS`` is a generator of DataFrame chunks: the filter is
+evaluated once as a boolean mask over the cached report table, and only
+``CHUNK_ROWS`` matching rows at a time are taken out of it, so no filtered
+copy of the whole table is ever built. The writers turn the chunks into a
+stream of bytes as they come (a Parquet row group per chunk; XLSX rows go
+through openpyxl's write-only mode, which keeps them on disk until the zip
+is written). The app's download button needs the whole file as bytes
+(``export_bytes``), so there an export is held in memory once, when the
+button is clicked.
+
+From the command line the stream goes straight to a file::
+
+    python export.py Bali 200HR Overview Bookings --year 2024 --month March --format csv -o bookings.csv
+"""
+
+import argparse
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import schema
+from cohorts import get_cohorts
+from nights import get_night_calendar
+from reports import get_batches, get_location_table, get_period, get_report
+from ryp import get_student_database
+from snapshot import pa, pq
+
+CHUNK_ROWS = 50_000
+
+READ_BLOCK = 1024 * 1024
+
+# Data rows per XLSX sheet, below Excel's limit of 1,048,576 rows including the header
+XLSX_SHEET_ROWS = 1_000_000
+
+
+def filter_positions(table, category=None, selected_year="All", selected_month=None):
+    """Positions of the rows of ``table`` in the filter, without copying any row."""
+    mask = np.ones(len(table), dtype=bool)
+    if category is not None:
+        mask &= (table["Category"] == category).to_numpy(dtype=bool, na_value=False)
+    if selected_year != "All":
+        mask &= (table["Year"] == selected_year).to_numpy(dtype=bool, na_value=False)
+        if selected_month:
+            mask &= (table["Month"] == selected_month).to_numpy(dtype=bool, na_value=False)
+    return np.flatnonzero(mask)
+
+
+def table_chunks(table, positions, chunk_rows=CHUNK_ROWS):
+    """The rows of ``table`` at ``positions``, ``chunk_rows`` at a time (one empty chunk if none)."""
+    if not len(positions):
+        yield table.iloc[:0]
+    for start in range(0, len(positions), chunk_rows):
+        yield table.take(positions[start:start + chunk_rows])
+
+
+def frame_chunks(frame):
+    # Aggregates are small: one chunk, with the index as columns
+    yield frame.reset_index() if frame.index.name or frame.index.nlevels > 1 else frame
+
+
+def booking_rows(report, selected_year="All", selected_month=None):
+    # Baris sales di balik KPI "Total Booking": bernama dan punya PAID STATUS
+    sales = data_loader.load_report_table(report.sources[1])
+    positions = filter_positions(sales, report.category, selected_year, selected_month)
+    return table_chunks(sales, positions[schema.booked(sales).to_numpy()[positions]])
+
+
+def occupancy_rows(report, selected_year="All", selected_month=None):
+    occupancy = data_loader.load_report_table(report.sources[0])
+    return table_chunks(occupancy, filter_positions(occupancy, report.category, selected_year, selected_month))
+
+
+def location_table(report, selected_year="All", selected_month=None):
+    return frame_chunks(get_location_table(report.category, selected_year, selected_month, report.location))
+
+
+def batch_rows(report, selected_year="All", selected_month=None):
+    start, end = get_period(selected_year, selected_month, report.location)
+    if start is None:
+        return frame_chunks(pd.DataFrame())
+    return frame_chunks(get_batches(report.category, start, end, report.location))
+
+
+def night_rows(report, selected_year="All", selected_month=None):
+    """Beds filled and offered per Site, Room and night, in long form, generated per block of rooms."""
+    fill, capacity = get_night_calendar(report.location).nights(report.category, selected_year, selected_month)
+    nights = fill.columns
+    rooms_per_chunk = max(1, CHUNK_ROWS // max(1, len(nights)))
+    for start in range(0, max(1, len(fill)), rooms_per_chunk):
+        rooms = fill.index[start:start + rooms_per_chunk]
+        yield pd.DataFrame({
+            "Site": rooms.get_level_values("Site").repeat(len(nights)),
+            "Room": rooms.get_level_values("Room").repeat(len(nights)),
+            "Night": np.tile(nights, len(rooms)),
+            "Fill": fill.to_numpy()[start:start + rooms_per_chunk].ravel(),
+            "Capacity": capacity.to_numpy()[start:start + rooms_per_chunk].ravel(),
+        })
+
+
+def student_rows(report, selected_year="All", selected_month=None):
+    students = get_student_database(report.program, report.location).students
+    return table_chunks(students, filter_positions(students, None, selected_year, selected_month))
+
+
+def cohort_rows(report, selected_year="All", selected_month=None):
+    return frame_chunks(get_cohorts(report.location).by_cohort(selected_year))
+
+
+# (dataset, view) -> export name -> chunk generator of (report, selected_year, selected_month)
+EXPORTS = {
+    ("bookings", "Overview"): {"Bookings": booking_rows, "Occupancy": occupancy_rows},
+    ("bookings", "Location"): {"Location table": location_table, "Occupancy": occupancy_rows},
+    ("bookings", "Batch"): {"Batches": batch_rows},
+    ("bookings", "Calendar"): {"Nights": night_rows},
+    ("students", "Overview"): {"Students": student_rows},
+    ("students", "Conversion"): {"Cohorts": cohort_rows},
+}
+
+
+def csv_stream(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode()
+        header = False
+
+
+class _Sink:
+    """Write-only file object whose bytes are handed out as they are written."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def parquet_stream(chunks):
+    sink = _Sink()
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def xlsx_stream(chunks):
+    import openpyxl
+
+    book = openpyxl.Workbook(write_only=True)
+    header, sheet, rows = None, None, XLSX_SHEET_ROWS
+    for chunk in chunks:
+        header = [str(column) for column in chunk.columns]
+        values = chunk.astype(object)
+        for row in values.where(chunk.notna(), None).itertuples(index=False, name=None):
+            # A sheet holds at most a million rows, longer exports continue on the next one
+            if rows == XLSX_SHEET_ROWS:
+                sheet, rows = book.create_sheet(f"Export {len(book.worksheets) + 1}"), 0
+                sheet.append(header)
+            sheet.append(row)
+            rows += 1
+    if sheet is None:
+        book.create_sheet("Export 1").append(header or [])
+    with tempfile.TemporaryFile() as file:
+        book.save(file)
+        file.seek(0)
+        while block := file.read(READ_BLOCK):
+            yield block
+
+
+# Format -> (file extension, MIME type, writer)
+FORMATS = {
+    "CSV": ("csv", "text/csv", csv_stream),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", xlsx_stream),
+}
+if pq is not None:
+    FORMATS["Parquet"] = ("parquet", "application/vnd.apache.parquet", parquet_stream)
+
+
+def export_stream(report, view, export, file_format, selected_year="All", selected_month=None):
+    """Bytes of one export of a view, generated chunk by chunk."""
+    chunks = EXPORTS[(report.dataset, view)][export](report, selected_year, selected_month)
+    return FORMATS[file_format][2](chunks)
+
+
+def file_name(report, view, export, file_format, selected_year="All", selected_month=None):
+    parts = [report.location, report.program, view, export, str(selected_year)]
+    if selected_year != "All" and selected_month:
+        parts.append(selected_month)
+    return "_".join(part.replace(" ", "-") for part in parts) + "." + FORMATS[file_format][0]
+
+
+def export_bytes(report, view, export, file_format, selected_year="All", selected_month=None):
+    """One export of a view as bytes, what Streamlit's download button takes."""
+    return b"".join(export_stream(report, view, export, file_format, selected_year, selected_month))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("location")
+    parser.add_argument("program")
+    parser.add_argument("view")
+    parser.add_argument("export")
+    parser.add_argument("--year", default="All")
+    parser.add_argument("--month")
+    parser.add_argument("--format", default="CSV", type=str.upper)
+    parser.add_argument("-o", "--output", help="file to write (default: standard output)")
+    args = parser.parse_args()
+
+    file_format = {name.upper(): name for name in FORMATS}[args.format]
+    year = args.year if args.year == "All" else int(args.year)
+    stream = export_stream(get_report(args.location, args.program), args.view, args.export, file_format, year, args.month)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for block in stream:
+            output.write(block)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
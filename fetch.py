@@ -0,0 +1,157 @@
+"""Conditional HTTP fetching of the remote workbooks.
+
+When a workbook is not on disk it is downloaded from GitHub. Downloads go
+through one pooled ``requests.Session`` (keep-alive connections are reused
+across reruns and threads) and are stored in a content-addressed cache under
+``FETCH_DIR``: ``objects/<sha256>`` holds the bytes and ``index.json`` maps
+each URL to its digest, ETag and Last-Modified. A later fetch sends
+``If-None-Match``/``If-Modified-Since``, so an unchanged workbook costs one
+304 round-trip and keeps the same digest, and therefore the same snapshot.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FETCH_DIR = os.environ.get("SALES_REPORT_FETCH_DIR", os.path.join(BASE_DIR, ".fetch_cache"))
+
+# A URL fetched less than this many seconds ago is not revalidated again
+REVALIDATE_AFTER = float(os.environ.get("SALES_REPORT_REVALIDATE_AFTER", 60))
+TIMEOUT = float(os.environ.get("SALES_REPORT_FETCH_TIMEOUT", 30))
+POOL_SIZE = 8
+CHUNK_SIZE = 1 << 16
+
+_session = None
+_session_lock = threading.Lock()
+_index_lock = threading.Lock()
+_url_locks = {}
+_checked_at = {}
+
+
+@dataclass(frozen=True)
+class Fetched:
+    """A fetched URL: local path of its bytes, their sha256 and whether they were downloaded (200) or unchanged (304)."""
+
+    url: str
+    path: str
+    digest: str
+    status: int
+
+
+def get_session():
+    """The process-wide session, with a connection pool per host."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Only imported for the first download: local or cached workbooks never need it
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def object_path(digest):
+    return os.path.join(FETCH_DIR, "objects", digest)
+
+
+def _index_path():
+    return os.path.join(FETCH_DIR, "index.json")
+
+
+def _read_index():
+    try:
+        with open(_index_path()) as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_index(url, entry):
+    with _index_lock:
+        index = _read_index()
+        index[url] = entry
+        os.makedirs(FETCH_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=FETCH_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(index, tmp_file, indent=1, sort_keys=True)
+        os.replace(tmp_path, _index_path())
+
+
+def _store(response):
+    """Stream a response body into the object store and return its digest."""
+    objects_dir = os.path.dirname(object_path(""))
+    os.makedirs(objects_dir, exist_ok=True)
+    sha256 = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=objects_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                sha256.update(chunk)
+                tmp_file.write(chunk)
+        digest = sha256.hexdigest()
+        os.replace(tmp_path, object_path(digest))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return digest
+
+
+def fetch(url, force=False):
+    """Return the ``Fetched`` bytes of ``url``, revalidating them if due.
+
+    Within ``REVALIDATE_AFTER`` seconds of the last check the cached object is
+    returned without any request, unless ``force`` is set.
+    """
+    with _index_lock:
+        url_lock = _url_locks.setdefault(url, threading.Lock())
+
+    with url_lock:
+        with _index_lock:
+            entry = _read_index().get(url)
+        if entry is not None and not os.path.exists(object_path(entry["digest"])):
+            entry = None  # the object was removed: download again
+
+        if entry is not None and not force and time.monotonic() - _checked_at.get(url, float("-inf")) < REVALIDATE_AFTER:
+            return Fetched(url, object_path(entry["digest"]), entry["digest"], 304)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with get_session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 304 and entry is not None:
+                response.content  # consume the empty body so the connection returns to the pool
+                _checked_at[url] = time.monotonic()
+                return Fetched(url, object_path(entry["digest"]), entry["digest"], 304)
+            response.raise_for_status()
+            digest = _store(response)
+            _update_index(url, {
+                "digest": digest,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            })
+        _checked_at[url] = time.monotonic()
+        return Fetched(url, object_path(digest), digest, 200)
+
+
+def fetch_all(urls, force=False):
+    """Fetch several URLs concurrently over the shared pool; returns {url: Fetched}."""
+    urls = list(dict.fromkeys(urls))
+    if len(urls) <= 1:
+        return {url: fetch(url, force) for url in urls}
+    with ThreadPoolExecutor(max_workers=min(len(urls), POOL_SIZE)) as executor:
+        return dict(zip(urls, executor.map(lambda url: fetch(url, force), urls)))
@@ -0,0 +1,119 @@
+"""Memoized Plotly figures for the report charts.
+
+Building a chart means an aggregation plus a ``px.bar`` call, and most reruns
+(a radio toggle, a sidebar click elsewhere) ask for figures that were already
+built. Figures are kept in a bounded, process-wide LRU cache keyed by the
+filter state, the chart and the data version, so a repeat view skips both.
+``plotly.express`` is only imported by the first figure built.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import data_loader
+import metrics
+
+
+class FigureCache:
+    """Thread-safe LRU cache of built figures with hit/miss counters."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.count("cache_hits_total", cache="figure")
+                return self._entries[key]
+            self.misses += 1
+        metrics.count("cache_misses_total", cache="figure")
+
+        figure = builder()
+        with self._lock:
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+FIGURE_CACHE = FigureCache(int(os.environ.get("SALES_REPORT_FIGURE_CACHE_SIZE", 256)))
+
+
+def cached_figure(key, builder, version=None):
+    """Return the figure for ``key`` (filter state + chart id), building it on a miss.
+
+    The data version (by default the one of the Bali workbooks) is appended to
+    the key, so figures of older data are never served and simply age out of
+    the LRU.
+    """
+    if version is None:
+        version = data_loader.current_version()
+
+    def build():
+        with metrics.span(f"figure:{key[-1]}"):
+            return builder()
+
+    return FIGURE_CACHE.get_or_build((*key, version), build)
+
+
+def bar_figure(series, x_label, y_label, title):
+    """Bar chart of a Series (index on the x axis) in the report style."""
+    import plotly.express as px
+
+    frame = series.rename_axis(x_label).reset_index(name=y_label)
+    fig = px.bar(frame, x=x_label, y=y_label, title=title, text_auto=True)
+    fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, template="plotly_white")
+    return fig
+
+
+def grouped_bar_figure(frame, x_label, columns, y_label, title):
+    """Side-by-side bars of several ``columns`` of ``frame`` per ``x_label`` value."""
+    import plotly.express as px
+
+    fig = px.bar(frame, x=x_label, y=list(columns), barmode="group", title=title, text_auto=True)
+    fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, legend_title_text="", template="plotly_white")
+    return fig
+
+
+def heatmap_figure(frame, x_label, y_label, title, percent=False):
+    """Heatmap of ``frame`` (index on the y axis, columns on the x axis) in the report style."""
+    import plotly.express as px
+
+    fig = px.imshow(
+        frame, x=frame.columns, y=frame.index, aspect="auto", color_continuous_scale="Blues", title=title,
+        labels={"x": x_label, "y": y_label, "color": ""},
+    )
+    fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, template="plotly_white")
+    if percent:
+        fig.update_coloraxes(colorbar_tickformat=".0%")
+        fig.update_traces(hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>%{{z:.0%}}<extra></extra>")
+    return fig
+
+
+def line_figure(frame, x_label, y_label, title, percent=False):
+    """One line per column of ``frame`` over its index, in the report style."""
+    import plotly.express as px
+
+    legend = frame.columns.name or "Series"
+    long = frame.rename_axis(x_label).reset_index().melt(id_vars=x_label, var_name=legend, value_name=y_label)
+    fig = px.line(long, x=x_label, y=y_label, color=legend, markers=True, title=title)
+    fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, legend_title_text=legend, template="plotly_white")
+    if percent:
+        fig.update_yaxes(tickformat=".0%")
+    return fig
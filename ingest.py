@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Parallel ingest of the workbooks of every location.
+
+Parsing xlsx XML is CPU-bound, so workbooks without a usable snapshot are
+parsed in a process pool, one workbook per task: each worker writes the
+Parquet snapshot, and the calling process then only reads snapshots. A cold
+start therefore takes about as long as the largest workbook as long as there
+are cores for every location. Workbooks whose snapshot can be refreshed
+incrementally stay in the calling process, which keeps their
+``snapshot.Delta`` for the aggregates.
+
+``unified_table(kind)`` concatenates the report tables of one kind across
+locations into one dataset with a ``Location`` column. Run as a script after a
+data drop to ingest everything up front::
+
+    python ingest.py [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import data_loader
+import snapshot
+import workbook
+
+WORKERS = int(os.environ.get("SALES_REPORT_INGEST_WORKERS", os.cpu_count()))
+
+
+def cold_sources(names):
+    """Sources among ``names`` whose snapshot has to be built from the workbook in full."""
+    if snapshot.pq is None:
+        return []
+    cold = []
+    for name in names:
+        if snapshot.snapshot_is_fresh(name, data_loader.source_version(name)):
+            continue
+        if snapshot.row_key(name) and snapshot.snapshot_source_version(snapshot.snapshot_path(name)) is not None:
+            continue
+        cold.append(name)
+    return cold
+
+
+def ingest_source(name):
+    start = time.perf_counter()
+    rows = len(data_loader.read_workbook(name))
+    return name, rows, time.perf_counter() - start
+
+
+def ingest(names=None, workers=WORKERS):
+    """Build the snapshots of the cold sources among ``names`` (default: all), in parallel.
+
+    Returns ``(name, rows, seconds)`` per ingested source.
+    """
+    names = list(names or data_loader.SOURCES)
+    data_loader.prefetch(names)
+    cold = cold_sources(names)
+    if workers <= 1 or len(cold) <= 1:
+        return [ingest_source(name) for name in cold]
+    # Spawned, not forked: the caller may be a threaded server
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(cold)), mp_context=context) as executor:
+        return list(executor.map(ingest_source, cold))
+
+
+def concat_tables(tables):
+    """Concatenate tables whose columns may differ (e.g. the 200HR and 300HR
+    student databases); a column missing from a table is empty there.
+    """
+    dtypes = {}
+    for table in tables:
+        for column, dtype in table.dtypes.items():
+            dtypes.setdefault(column, dtype)
+    aligned = [
+        table.reindex(columns=list(dtypes)).astype({column: dtypes[column] for column in dtypes if column not in table})
+        for table in tables
+    ]
+    # Categorical columns keep their dtype with the union of the categories
+    return workbook.concat_chunks(aligned)
+
+
+def unified_table(kind):
+    """The report tables of one kind (schema.TABLE_KINDS) of every location, with a ``Location`` column.
+
+    Built once per data version of its sources.
+    """
+    names = data_loader.sources_of_kind(kind)
+
+    def build():
+        tables = []
+        for name in names:
+            table = data_loader.load_report_table(name)
+            location = pd.Categorical([data_loader.MANIFEST[name].location] * len(table))
+            tables.append(table.assign(Location=location))
+        return concat_tables(tables) if tables else pd.DataFrame()
+
+    return data_loader.cached(("unified", kind), data_loader.data_version(names), build, ttl=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ingested = ingest(workers=args.workers)
+    for name, rows, seconds in ingested:
+        source = data_loader.MANIFEST[name]
+        print(f"{source.location:<12}{name:<24}{rows:>10} rows{seconds:>9.2f}s")
+    print(f"{len(ingested)} of {len(data_loader.SOURCES)} workbooks ingested in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Which workbooks exist, per location.
+
+Every location keeps its workbooks in a "<Location> data/" directory under
+``data_loader.DATA_DIR``, named after what they hold:
+
+* ``<prefix>_occupancy.xlsx`` and ``<prefix>_sales.xlsx``: beds and bookings
+  of the location's batches
+* ``<prefix>_student_database_<program>.xlsx``: the student database of one
+  program, e.g. ``ryp_student_database_200hr.xlsx``
+
+Adding a school means adding its directory: ``discover`` finds its workbooks
+and the report pages follow (see ``reports.build_registry``). Workbooks that
+are not on disk (the app then reads them from GitHub) are taken from
+``DEFAULT_SOURCES``.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+
+LOCATION_DIR = re.compile(r"^(?P<location>.+) data$")
+BOOKINGS_WORKBOOK = re.compile(r"^(?P<prefix>\w+?)_(?P<kind>occupancy|sales)\.xlsx$", re.IGNORECASE)
+STUDENTS_WORKBOOK = re.compile(r"^(?P<prefix>\w+?)_student_database_(?P<program>\d+hr)\.xlsx$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Source:
+    """One workbook: the table it is read into and where it belongs."""
+
+    name: str  # table name, e.g. "bali_sales" or "ryp_200hr"
+    location: str
+    kind: str  # "occupancy", "sales" or "students" (schema.TABLE_KINDS)
+    path: str  # relative to the data directory, same layout on GitHub
+    program: str = None  # student databases only
+
+
+def source_from_path(path):
+    """The Source of a workbook at ``path`` ("<Location> data/<file>"), or None if not one."""
+    directory, filename = os.path.split(path)
+    location = LOCATION_DIR.match(os.path.basename(directory))
+    if location is None:
+        return None
+    location = location["location"]
+    match = BOOKINGS_WORKBOOK.match(filename)
+    if match:
+        kind = match["kind"].lower()
+        return Source(f"{match['prefix'].lower()}_{kind}", location, kind, path)
+    match = STUDENTS_WORKBOOK.match(filename)
+    if match:
+        program = match["program"].upper()
+        return Source(f"{match['prefix'].lower()}_{program.lower()}", location, "students", path, program)
+    return None
+
+
+DEFAULT_SOURCES = tuple(map(source_from_path, (
+    "Bali data/bali_occupancy.xlsx",
+    "Bali data/bali_sales.xlsx",
+    "RYP data/ryp_student_database_200hr.xlsx",
+    "RYP data/ryp_student_database_300hr.xlsx",
+)))
+
+
+def discover(data_dir):
+    """Sources of every workbook in the "<Location> data" directories of ``data_dir``."""
+    sources = []
+    try:
+        entries = sorted(os.listdir(data_dir))
+    except OSError:
+        return sources
+    for entry in entries:
+        if not LOCATION_DIR.match(entry) or not os.path.isdir(os.path.join(data_dir, entry)):
+            continue
+        for filename in sorted(os.listdir(os.path.join(data_dir, entry))):
+            source = source_from_path(f"{entry}/{filename}")
+            if source is not None:
+                sources.append(source)
+    return sources
+
+
+def load_manifest(data_dir):
+    """{table name: Source} of the discovered workbooks plus the defaults not on disk."""
+    manifest = {source.name: source for source in DEFAULT_SOURCES}
+    manifest.update((source.name, source) for source in discover(data_dir))
+    return manifest
+
+
+def locations(manifest):
+    """Location -> {kind: [table names]}, in discovery order."""
+    by_location = {}
+    for source in manifest.values():
+        by_location.setdefault(source.location, {}).setdefault(source.kind, []).append(source.name)
+    return by_location
@@ -0,0 +1,193 @@
+"""Opt-in timing spans, cache counters and DataFrame memory gauges.
+
+Enabled with ``SALES_REPORT_METRICS=1``. When disabled, ``timed`` returns the
+decorated function itself and ``span`` a shared no-op context manager, so the
+instrumented code runs exactly as before.
+
+Spans of the current render are collected per thread for the debug panel of
+the app (see ``views.render_debug_panel``) and logged as one JSON line per
+render on the ``sales_report.metrics`` logger. Process totals are available
+as Prometheus text from ``prometheus_text()``, served over HTTP on
+``SALES_REPORT_METRICS_PORT`` when it is set. ``startup`` adds the import
+time and time to first render of the process.
+"""
+
+import functools
+import http.server
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get("SALES_REPORT_METRICS", "").lower() in ("1", "true", "yes")
+METRICS_PORT = os.environ.get("SALES_REPORT_METRICS_PORT")
+
+logger = logging.getLogger("sales_report.metrics")
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_span_totals = {}  # span name -> [calls, seconds]
+_counters = {}  # (name, labels) -> value
+_gauges = {}  # (name, labels) -> value
+_server = None
+_started = None  # perf_counter when the app began importing, see startup()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+@contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            totals = _span_totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append((name, seconds))
+
+
+def span(name):
+    """Context manager timing the block as ``name`` (a no-op when disabled)."""
+    return _span(name) if ENABLED else _NOOP
+
+
+def timed(function=None, name=None):
+    """Decorator timing every call of a function as a span named after it."""
+    if function is None:
+        return functools.partial(timed, name=name)
+    if not ENABLED:
+        return function
+    span_name = name or function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _span(span_name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def count(name, value=1, **labels):
+    if ENABLED:
+        key = (name, _labels(labels))
+        with _lock:
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge(name, value, **labels):
+    if ENABLED:
+        with _lock:
+            _gauges[(name, _labels(labels))] = value
+
+
+def dataframe_gauge(df, **labels):
+    """Record the deep memory footprint of a DataFrame (computed only when enabled)."""
+    if ENABLED:
+        gauge("dataframe_bytes", int(df.memory_usage(deep=True).sum()), **labels)
+
+
+def startup(started, imported):
+    """Record, once per process, how long the app's imports took (``perf_counter`` values).
+
+    The first ``end_render`` then records the time to first render from ``started``.
+    """
+    global _started
+    if ENABLED and _started is None:
+        _started = started
+        gauge("startup_import_seconds", imported - started)
+
+
+def begin_render():
+    """Start collecting the spans of one render on this thread."""
+    if ENABLED:
+        _local.spans = []
+        _local.started = time.perf_counter()
+
+
+def end_render(**context):
+    """Stop collecting, log the render as one JSON line and return its spans."""
+    spans = getattr(_local, "spans", None)
+    if not ENABLED or spans is None:
+        return []
+    total = time.perf_counter() - _local.started
+    _local.spans = None
+    count("renders_total")
+    if _started is not None and ("startup_first_render_seconds", ()) not in _gauges:
+        gauge("startup_first_render_seconds", time.perf_counter() - _started)
+    logger.info(json.dumps({
+        "event": "render",
+        **{key: str(value) for key, value in context.items()},
+        "seconds": round(total, 6),
+        "spans": [{"name": name, "seconds": round(seconds, 6)} for name, seconds in spans],
+    }))
+    return [("render", total)] + spans
+
+
+def snapshot():
+    """Copies of the span totals, counters and gauges collected so far."""
+    with _lock:
+        return (
+            {name: tuple(totals) for name, totals in _span_totals.items()},
+            dict(_counters),
+            dict(_gauges),
+        )
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def prometheus_text():
+    """Prometheus text exposition of every metric collected so far."""
+    span_totals, counters, gauges = snapshot()
+    lines = [
+        "# TYPE sales_report_span_seconds_total counter",
+        *(f'sales_report_span_seconds_total{{span="{name}"}} {seconds:.6f}' for name, (_, seconds) in sorted(span_totals.items())),
+        "# TYPE sales_report_span_calls_total counter",
+        *(f'sales_report_span_calls_total{{span="{name}"}} {calls}' for name, (calls, _) in sorted(span_totals.items())),
+    ]
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(f"sales_report_{name}{_format_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        lines.append(f"sales_report_{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=METRICS_PORT):
+    """Serve ``/metrics`` on ``port`` from a daemon thread, once per process."""
+    global _server
+    if not ENABLED or not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = http.server.ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
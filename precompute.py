@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Precompute the datasets of every report page into the on-disk store.
+
+Runs headless (no Streamlit) after each data drop, e.g. from cron::
+
+    python precompute.py [--workers 4] [--store .precomputed/reports.pickle]
+
+Every Location x Program x Year (incl. "All") x Month x View permutation is
+computed with the same report functions as the app, in a process pool, and
+written to ``store.STORE_PATH``.
+
+``warm_up`` alone (ingest, aggregates, chart library) is also what the app's
+background refresher runs for every new data version, see ``refresher.py``.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import data_loader
+import store
+from batches import get_batch_index
+from cohorts import get_cohorts
+from cube import get_cube
+from nights import get_night_calendar
+from reports import REGISTRY, VIEW_DATA, get_report, get_sorted_months_for_year, get_unique_years, months_by_year, view_data
+from ryp import get_student_database
+
+
+def permutations():
+    """Every (report, view, year, month) a page can show, as store keys.
+
+    Each report also gets an "index" entry with its Year/Month selector options.
+    """
+    for programs in REGISTRY.values():
+        for report in programs.values():
+            yield store.store_key(report, "index")
+            views = [view for view in report.views if (report.dataset, view) in VIEW_DATA]
+            filters = [("All", None)] + [
+                (year, month)
+                for year in get_unique_years(report)
+                for month in get_sorted_months_for_year(year, report)
+            ]
+            for view in views:
+                for year, month in filters:
+                    yield store.store_key(report, view, year, month)
+
+
+def compute(key):
+    location, program, view, year, month = key
+    report = get_report(location, program)
+    if view == "index":
+        return key, {"months_by_year": months_by_year(report)}
+    data = view_data(report, view, year, month, use_store=False)
+    return key, {name: getattr(data, name) for name in data.DATASETS}
+
+
+def source_names():
+    return sorted({name for programs in REGISTRY.values() for report in programs.values() for name in report.sources})
+
+
+def warm_up():
+    # Ingest every source (in parallel) and build the shared aggregates once,
+    # before the workers start, so they read fresh snapshots (or inherit them on fork)
+    import ingest
+
+    ingest.ingest(source_names())
+    for programs in REGISTRY.values():
+        for report in programs.values():
+            if report.dataset == "students":
+                get_student_database(report.program, report.location)
+                if "Conversion" in report.views:
+                    get_cohorts(report.location)
+            else:
+                get_cube(report.location)
+                get_night_calendar(report.location)
+                get_batch_index(report.location)
+    # The first chart of every worker imports it otherwise
+    import plotly.express  # noqa: F401
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--store", default=store.STORE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    warm_up()
+    versions = {name: data_loader.source_version(name) for name in source_names()}
+    keys = list(permutations())
+    chunksize = max(1, len(keys) // (4 * args.workers))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        entries = dict(executor.map(compute, keys, chunksize=chunksize))
+    store.write_store(entries, versions, args.store)
+    print(f"{len(entries)} pages precomputed into {args.store} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
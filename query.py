@@ -0,0 +1,154 @@
+"""Embedded SQL access to the normalised report tables.
+
+The report tables (normalised, without personal details) of the sales,
+occupancy and student-database workbooks of every location are loaded as
+the unified, location-tagged tables of ``ingest.unified_table``, once per data
+version, into an SQLite database file indexed on (location, category, year,
+month, site). Questions are named, parameterised queries in
+``QUERIES``. Every thread reads through its own read-only connection, whose
+prepared statements are cached and reused, so several queries can run at the
+same time (SQLite releases the GIL while it steps through a query).
+
+The dashboard views keep reading the pre-aggregated cube; this is the
+engine for ad-hoc and multi-year questions asked from reports and scripts,
+so the database is only built the first time one is asked.
+"""
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import weakref
+
+import pandas as pd
+
+import data_loader
+import ingest
+import schema
+import snapshot
+
+# SQL table -> table kind (unified across locations) and the columns it is indexed on
+TABLES = {
+    "sales": ("sales", ("location", "category", "year", "month", "site")),
+    "occupancy": ("occupancy", ("location", "category", "year", "month", "site")),
+    "students": ("students", ("location", "category", "year", "month")),
+}
+
+# Name -> SQL; "{where}" is replaced by the Location/Category/Year/Month filter
+QUERIES = {
+    "revenue_by_payment_channel": """
+        SELECT payment_channel, SUM(booked) AS bookings, SUM(paid) AS paid
+        FROM sales WHERE {where} GROUP BY payment_channel ORDER BY paid DESC""",
+    "balance_by_site": """
+        SELECT site, SUM(total_amount) AS total_amount, SUM(paid) AS paid, SUM(balance) AS balance
+        FROM sales WHERE {where} GROUP BY site ORDER BY balance DESC""",
+    "discount_totals": """
+        SELECT site, COUNT(disc_scholarship) AS discounted, SUM(disc_scholarship) AS discount,
+               SUM(additional_fee) AS additional_fee
+        FROM sales WHERE {where} GROUP BY site ORDER BY discount DESC""",
+}
+
+
+def sql_name(column):
+    """Column name as an SQL identifier: "Disc/ Scholarship" -> "disc_scholarship"."""
+    return re.sub(r"\W+", "_", column.strip()).strip("_").lower()
+
+
+def to_sql_frame(df):
+    """A report table (no personal details) with SQLite-friendly values and names."""
+    columns = {}
+    if "PAID STATUS" in df and "Named" in df:
+        columns["booked"] = schema.booked(df).astype("int64")
+        df = df.drop(columns="Named")
+    for column, values in df.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_extension_array_dtype(values):
+            values = values.astype(object).where(values.notna(), None)
+        columns[sql_name(column)] = values
+    frame = pd.DataFrame(columns)
+    if "month" in frame:
+        frame["month_number"] = frame["month"].map({month: number for number, month in enumerate(schema.MONTHS, 1)})
+    return frame
+
+
+def filter_clause(selected_year="All", selected_month=None, location=None):
+    """The WHERE clause of a Location/Category/Year/Month filter, as used by the report functions.
+
+    Only a handful of statement texts exist (category; + year; + month; each
+    with or without location), so their prepared statements are reused
+    whatever the values.
+    """
+    clause = "category = :category"
+    if location is not None:
+        clause += " AND location = :location"
+    if selected_year != "All":
+        clause += " AND year = :year"
+        if selected_month:
+            clause += " AND month = :month"
+    return clause
+
+
+class ReportDatabase:
+    """An indexed SQLite file of the report tables, with one read-only connection per thread."""
+
+    def __init__(self, frames):
+        os.makedirs(snapshot.SNAPSHOT_DIR, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=snapshot.SNAPSHOT_DIR, prefix="report-", suffix=".sqlite")
+        os.close(fd)
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+        self._local = threading.local()
+
+        with sqlite3.connect(self.path) as connection:
+            for table, frame in frames.items():
+                frame.to_sql(table, connection, index=False, if_exists="replace")
+                columns = TABLES[table][1]
+                connection.execute(f"CREATE INDEX {table}_filter ON {table} ({', '.join(columns)})")
+            connection.execute("ANALYZE")
+        connection.close()
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Build from {table kind: unified report table}."""
+        return cls({table: to_sql_frame(tables[kind]) for table, (kind, _) in TABLES.items()})
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def query(self, sql, params=None):
+        """Run any read-only SQL with named ``params`` and return a DataFrame."""
+        return pd.read_sql_query(sql, self.connection(), params=params)
+
+    def run(self, name, category, selected_year="All", selected_month=None, location=None):
+        """Run query ``name`` of ``QUERIES`` for a Category/Year/Month filter, in one or every location."""
+        sql = QUERIES[name]
+        params = {"category": category, "year": selected_year, "month": selected_month, "location": location}
+        return self.query(sql.format(where=filter_clause(selected_year, selected_month, location)), params)
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def source_names():
+    return tuple(name for kind, _ in TABLES.values() for name in data_loader.sources_of_kind(kind))
+
+
+def get_database():
+    """The ReportDatabase of the current tables of every location, built once per data version."""
+    return data_loader.cached(
+        ("sql",),
+        data_loader.data_version(source_names()),
+        lambda: ReportDatabase.from_tables({kind: ingest.unified_table(kind) for kind, _ in TABLES.values()}),
+        ttl=None,
+    )
@@ -0,0 +1,122 @@
+"""Background refresh of the report data, published with an atomic version swap.
+
+A daemon thread checks the sources every ``REFRESH_INTERVAL`` seconds
+(fetching or revalidating the remote ones). When a version changed, it builds
+the report tables and every aggregate (``precompute.warm_up``) for the new
+versions while readers keep seeing the published ones
+(``data_loader.pinned_versions``), then publishes the new versions in one
+swap. A page therefore never waits for a fetch or a parse, and never mixes
+tables of two refreshes: before the swap it reads the previous data, after it
+the new data, already built.
+
+Until the first refresh is published, pages load their data inline as
+before. ``SALES_REPORT_REFRESH_INTERVAL=0`` keeps it that way.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import data_loader
+import metrics
+import precompute
+
+REFRESH_INTERVAL = float(os.environ.get("SALES_REPORT_REFRESH_INTERVAL", 5 * 60))
+
+logger = logging.getLogger("sales_report.refresher")
+
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+_last = None  # Refresh last published, replaced as a whole
+# Whether a refresh was published since the superseded entries were last dropped
+_drop_pending = False
+
+
+def version_digest(versions):
+    """Short digest of {source name: version}, as shown in the sidebar."""
+    combined = "|".join(f"{name}={version}" for name, version in sorted(versions.items()))
+    return hashlib.sha1(combined.encode()).hexdigest()[:8]
+
+
+@dataclass(frozen=True)
+class Refresh:
+    """One published set of source versions."""
+
+    number: int
+    versions: dict
+    published_at: float  # time.time()
+    seconds: float  # building the tables and aggregates
+
+    @property
+    def version(self):
+        return version_digest(self.versions)
+
+
+def refresh():
+    """Build the data of the sources as they are now and publish it.
+
+    Returns the new ``Refresh``, or None when no source changed since the last one.
+    """
+    global _last, _drop_pending
+    if _drop_pending:
+        # Readers moved to the last published versions one refresh ago. After a
+        # failed round they still read the superseded entries, which are kept.
+        data_loader.drop_superseded()
+        _drop_pending = False
+    versions = data_loader.live_versions(data_loader.SOURCES)
+    if _last is not None and versions == _last.versions:
+        return None
+    start = time.perf_counter()
+    with metrics.span("refresh"), data_loader.pinned_versions(versions):
+        # Ingests the changed workbooks (in the process pool), then builds every aggregate
+        precompute.warm_up()
+    seconds = time.perf_counter() - start
+    refreshed = Refresh((_last.number + 1) if _last else 1, versions, time.time(), seconds)
+    data_loader.publish(versions)
+    _last = refreshed
+    _drop_pending = True
+    metrics.gauge("refresh_seconds", seconds)
+    metrics.count("refreshes_total")
+    logger.info("published data version %s in %.2fs", refreshed.version, seconds)
+    return refreshed
+
+
+def run(interval=REFRESH_INTERVAL):
+    while not _stop.is_set():
+        try:
+            refresh()
+        except Exception:
+            # The published data stays as it was; the next round tries again
+            logger.exception("data refresh failed")
+        _stop.wait(interval)
+
+
+def start(interval=REFRESH_INTERVAL):
+    """Start refreshing on a daemon thread, once per process (not when ``interval`` is 0)."""
+    global _thread
+    if not interval:
+        return None
+    with _lock:
+        if _thread is None:
+            _stop.clear()
+            _thread = threading.Thread(target=run, args=(interval,), name="refresher", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def stop():
+    global _thread
+    with _lock:
+        _stop.set()
+        if _thread is not None:
+            _thread.join()
+        _thread = None
+
+
+def last_refresh():
+    """The ``Refresh`` published last, or None before the first one."""
+    return _last
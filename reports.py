@@ -0,0 +1,355 @@
+"""Report registry and the report functions behind every view.
+
+Nothing here imports Streamlit: ``views.py`` renders what these functions
+compute, and the same functions can be reused from scripts.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+
+import pandas as pd
+
+import metrics
+import store
+from batches import get_batch_index
+from cohorts import FIRST_PROGRAM, SECOND_PROGRAM, get_cohorts
+from cube import get_cube
+from data_loader import MANIFEST, booking_sources, current_version, load_private_table
+from manifest import locations
+from nights import get_night_calendar
+from ryp import get_student_database, source_name
+from schema import MONTHS, booked
+
+VIEWS = ("Overview", "Location", "Batch", "Calendar")
+
+# Programs of the sales/occupancy workbooks, stored as their 'Category' values
+BOOKING_PROGRAMS = ("200HR", "300HR")
+
+# Student database columns charted on the RYP Overview
+STUDENT_GROUPS = ("Room type", "Booking source", "Residence Country")
+
+
+@dataclass(frozen=True)
+class ProgramReport:
+    """One Location/Program page: where its data comes from and which views it has."""
+
+    location: str
+    program: str
+    sources: tuple
+    views: tuple = VIEWS
+    # "bookings" pages read the sales/occupancy workbooks, "students" pages a student database
+    dataset: str = "bookings"
+
+    @property
+    def category(self):
+        # Programs are stored as the 'Category' column of the workbooks
+        return self.program
+
+
+def build_registry(manifest):
+    """Location -> Program -> report, for the workbooks of a ``manifest.load_manifest``.
+
+    A location with sales and occupancy workbooks gets the bookings pages of
+    every ``BOOKING_PROGRAMS``; each student database adds a page for its
+    program unless the location already has a bookings page for it. With both
+    a 200HR and a 300HR database, the 200HR page also gets the Conversion view,
+    which reads both.
+    """
+    registry = {}
+    for location, kinds in locations(manifest).items():
+        programs = registry.setdefault(location, {})
+        if "occupancy" in kinds and "sales" in kinds:
+            sources = (kinds["occupancy"][0], kinds["sales"][0])
+            for program in BOOKING_PROGRAMS:
+                programs[program] = ProgramReport(location, program, sources)
+        students = {manifest[name].program: name for name in kinds.get("students", ())}
+        for program, name in students.items():
+            sources, views = (name,), ("Overview",)
+            if program == FIRST_PROGRAM and SECOND_PROGRAM in students:
+                sources, views = (name, students[SECOND_PROGRAM]), ("Overview", "Conversion")
+            programs.setdefault(program, ProgramReport(location, program, sources, views=views, dataset="students"))
+    return registry
+
+
+# Location -> Program -> report. Adding a site means adding its "<Location> data" directory.
+REGISTRY = build_registry(MANIFEST)
+
+
+def get_report(location, program):
+    return REGISTRY[location][program]
+
+
+def months_by_year(report=None):
+    """Year -> months in calendar order, for the Year/Month selectors of a page."""
+    if report is not None:
+        precomputed = store.lookup(report, "index")
+        if precomputed is not None:
+            return precomputed["months_by_year"]
+    # RYP pages only load their own program's student database, on first use
+    if report is not None and report.dataset == "students":
+        return get_student_database(report.program, report.location).months_by_year
+    return get_cube(report.location if report is not None else "Bali").months_by_year
+
+
+@metrics.timed
+def get_unique_years(report=None):
+    return list(months_by_year(report))
+
+
+@metrics.timed
+def get_sorted_months_for_year(selected_year, report=None):
+    if selected_year != "All":
+        # Bulan yang tersedia untuk tahun terpilih, sudah urut kalender di index
+        sorted_month_strings = months_by_year(report).get(selected_year, [])
+    else:
+        sorted_month_strings = []  # No months needed for "All"
+
+    return sorted_month_strings
+
+
+@metrics.timed
+def get_sales_summary_count_amount_paid_and_occupancy_mean(category, selected_year="All", selected_month=None, location="Bali"):
+    # Jumlah pemesanan, total amount paid dan rata-rata occupancy dari cube yang sudah diagregasi
+    return get_cube(location).summary(category, selected_year, selected_month)
+
+
+@metrics.timed
+def get_favorite_sites(category, selected_year="All", selected_month=None, location="Bali"):
+    # Total 'Fill' per 'Site' dari cube
+    return get_cube(location).fill_counts(category, selected_year, selected_month, group_by="Site")
+
+
+@metrics.timed
+def get_fill_by_room(category, selected_year="All", selected_month=None, location="Bali"):
+    # Total 'Fill' per 'Room' dari cube
+    return get_cube(location).fill_counts(category, selected_year, selected_month, group_by="Room")
+
+
+@metrics.timed
+def get_fill_counts(category, selected_year="All", selected_month=None, group_by="Site", location="Bali"):
+    # Total 'Fill' per kolom yang ditentukan ('Site', 'Room', atau 'Month') dari cube
+    return get_cube(location).fill_counts(category, selected_year, selected_month, group_by=group_by)
+
+
+@metrics.timed
+def get_location_table(category, selected_year="All", selected_month=None, location="Bali"):
+    # Per Site dan Room: Capacity, Fill, kamar tidak terjual (Available), utilisasi dan revenue per bed
+    return get_cube(location).location_table(category, selected_year, selected_month)
+
+
+@metrics.timed
+def get_utilisation_over_time(category, selected_year="All", group_by="Site", location="Bali"):
+    # Utilisasi (Fill / Capacity) per bulan untuk setiap Site, dari cube
+    return get_cube(location).utilisation_over_time(category, selected_year, group_by=group_by)
+
+
+@metrics.timed
+def get_night_occupancy(category, selected_year="All", selected_month=None, location="Bali"):
+    # Bed terisi dan kapasitas per malam untuk setiap Site dan Room, dari kalender per malam
+    return get_night_calendar(location).nights(category, selected_year, selected_month)
+
+
+@metrics.timed
+def get_revenue_by_payment_channel(category, selected_year="All", selected_month=None, location="Bali"):
+    # Jumlah booking dan total PAID per channel pembayaran, lewat query SQL
+    from query import get_database
+
+    return get_database().run("revenue_by_payment_channel", category, selected_year, selected_month, location)
+
+
+@metrics.timed
+def get_balance_by_site(category, selected_year="All", selected_month=None, location="Bali"):
+    # Sisa BALANCE (belum dibayar) per Site, lewat query SQL
+    from query import get_database
+
+    return get_database().run("balance_by_site", category, selected_year, selected_month, location)
+
+
+@metrics.timed
+def get_discount_totals(category, selected_year="All", selected_month=None, location="Bali"):
+    # Total diskon/scholarship dan additional fee per Site, lewat query SQL
+    from query import get_database
+
+    return get_database().run("discount_totals", category, selected_year, selected_month, location)
+
+
+@metrics.timed
+def get_period(selected_year="All", selected_month=None, location="Bali"):
+    """First and last day covered by a Year/Month filter ("All" spans every batch)."""
+    if selected_year == "All":
+        return get_batch_index(location).date_range()
+    if not selected_month:
+        return pd.Timestamp(selected_year, 1, 1), pd.Timestamp(selected_year, 12, 31)
+    first_day = pd.Timestamp(selected_year, MONTHS.index(selected_month) + 1, 1)
+    return first_day, first_day + pd.offsets.MonthEnd(0)
+
+
+@metrics.timed
+def get_batches(category, start, end, location="Bali"):
+    # Batch yang berjalan (overlap) di rentang tanggal, dengan Fill, Capacity dan revenue per batch
+    return get_batch_index(location).overlapping(start, end, category=category)
+
+
+@metrics.timed
+def get_batch_bookings(category, site, start, end, location="Bali"):
+    # Booking satu batch Site dengan nama dari tabel data pribadi, yang baru dimuat saat drill-down
+    name = booking_sources(location)[1]
+    sales, private = load_private_table(name)
+    bookings = sales[
+        (sales["Category"] == category)
+        & (sales["Site"] == site)
+        & (sales["Batch start date"] == start)
+        & (sales["Batch end date"] == end)
+        & booked(sales)
+    ]
+    names = private.loc[bookings.index, ["NAME"]]
+    return names.join(bookings[["Group", "ROOM TYPE", "PAID", "BALANCE", "PAID STATUS"]])
+
+
+class ViewData:
+    """Datasets of one view for one filter.
+
+    Each dataset is computed on first access and then shared by every widget
+    of the render; datasets whose chart is served from the figure cache are
+    never computed at all. ``DATASETS`` are the cached properties that
+    ``precompute.py`` materialises ahead of time. ``program`` is the Category
+    of a booking report.
+    """
+
+    DATASETS = ()
+    LOCATION = "Bali"  # when none is given
+
+    def __init__(self, program, selected_year="All", selected_month=None, location=None):
+        self.program = program
+        self.selected_year = selected_year
+        self.selected_month = selected_month if selected_year != "All" else None
+        self.location = location or self.LOCATION
+        sources = self.sources()
+        self.version = current_version(sources) if sources else None
+
+    def sources(self):
+        """Sources whose combined version (``version``) keys the figures the view caches itself."""
+        return ()
+
+
+class Overview(ViewData):
+    """Datasets of the Overview view for one filter."""
+
+    DATASETS = ("summary", "site_counts", "room_counts", "month_counts")
+
+    @cached_property
+    def summary(self):
+        return get_sales_summary_count_amount_paid_and_occupancy_mean(
+            self.program, self.selected_year, self.selected_month, self.location
+        )
+
+    @cached_property
+    def site_counts(self):
+        return get_favorite_sites(self.program, self.selected_year, self.selected_month, self.location)
+
+    @cached_property
+    def room_counts(self):
+        return get_fill_by_room(self.program, self.selected_year, self.selected_month, self.location)
+
+    @cached_property
+    def month_counts(self):
+        # Total Fill per bulan untuk seluruh tahun terpilih (tidak tergantung bulan)
+        return get_fill_counts(self.program, self.selected_year, group_by="Month", location=self.location)
+
+
+class LocationOverview(ViewData):
+    """Datasets of the Location view for one filter."""
+
+    DATASETS = ("table", "utilisation")
+
+    @cached_property
+    def table(self):
+        return get_location_table(self.program, self.selected_year, self.selected_month, self.location)
+
+    @cached_property
+    def utilisation(self):
+        # Utilisasi per bulan untuk seluruh tahun terpilih (tidak tergantung bulan)
+        return get_utilisation_over_time(self.program, self.selected_year, location=self.location)
+
+
+class CalendarOverview(ViewData):
+    """Datasets of the Calendar view for one filter."""
+
+    DATASETS = ("nights",)
+
+    @cached_property
+    def nights(self):
+        return get_night_occupancy(self.program, self.selected_year, self.selected_month, self.location)
+
+
+class StudentOverview(ViewData):
+    """Datasets of the Overview view of a student database for one filter."""
+
+    DATASETS = ("summary", "group_counts")
+    LOCATION = "RYP"
+
+    def sources(self):
+        return (source_name(self.program, self.location),)
+
+    @cached_property
+    def database(self):
+        return get_student_database(self.program, self.location)
+
+    @cached_property
+    def summary(self):
+        return self.database.summary(self.selected_year, self.selected_month)
+
+    @cached_property
+    def group_counts(self):
+        return {
+            group_by: self.database.counts(group_by, self.selected_year, self.selected_month)
+            for group_by in STUDENT_GROUPS
+        }
+
+    def counts(self, group_by):
+        return self.group_counts[group_by]
+
+
+class StudentConversion(ViewData):
+    """Datasets of the Conversion view: 200HR students who went on to the 300HR, for one filter."""
+
+    DATASETS = ("summary", "by_cohort")
+    LOCATION = "RYP"
+
+    def sources(self):
+        return (source_name(FIRST_PROGRAM, self.location), source_name(SECOND_PROGRAM, self.location))
+
+    @cached_property
+    def cohorts(self):
+        return get_cohorts(self.location)
+
+    @cached_property
+    def summary(self):
+        return self.cohorts.conversion(self.selected_year, self.selected_month)
+
+    @cached_property
+    def by_cohort(self):
+        # Per bulan angkatan 200HR, selalu untuk seluruh tahun terpilih
+        return self.cohorts.by_cohort(self.selected_year)
+
+
+# (dataset, view) -> datasets class, for the views whose data can be precomputed
+VIEW_DATA = {
+    ("bookings", "Overview"): Overview,
+    ("bookings", "Location"): LocationOverview,
+    ("bookings", "Calendar"): CalendarOverview,
+    ("students", "Overview"): StudentOverview,
+    ("students", "Conversion"): StudentConversion,
+}
+
+
+def view_data(report, view, selected_year="All", selected_month=None, use_store=True):
+    """Datasets object of one view, pre-filled from the precomputed store when it is up to date.
+
+    The datasets are cached properties, so pre-filled ones are never computed.
+    """
+    data = VIEW_DATA[(report.dataset, view)](report.program, selected_year, selected_month, report.location)
+    precomputed = store.lookup(report, view, selected_year, selected_month) if use_store else None
+    if precomputed:
+        data.__dict__.update(precomputed)
+    return data
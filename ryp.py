@@ -0,0 +1,189 @@
+"""Student databases (RYP 200HR and 300HR, and any location laid out the same way).
+
+The sheets are maintained by hand: the header row sits under an optional band
+of title rows, column names are long free-text questions, marker columns
+("All", "Batch", "Period") repeat the batch on every row and dates are typed
+in several formats. ``read_student_database`` turns a sheet into the compact
+schema of ``schema.RYP_STUDENT_SCHEMA``; each program's workbook is only read
+when that program's page is opened.
+"""
+
+import re
+
+import pandas as pd
+
+import data_loader
+import schema
+from cube import build_month_index
+
+# (pattern, compact name). Long questions are matched on their leading words,
+# short marker headers must match exactly.
+COLUMN_PATTERNS = [
+    (r"batch start date", "Batch start date"),
+    (r"batch end date", "Batch end date"),
+    (r"s\.? ?no\.?$", "No"),
+    (r"name of student", "Name"),
+    (r"gender", "Gender"),
+    (r"email", "Email"),
+    (r"wa number", "WA number"),
+    (r"residence country", "Residence Country"),
+    (r"booking source", "Booking source"),
+    (r"room type", "Room type"),
+    (r"if twin", "Twin with"),
+    (r"student will do 300hr", "Continues to 300HR"),
+    (r"student joined 300hr", "Joined from 200HR"),
+    (r"booking handling method", "Handling method"),
+    (r"what channel", "Enquiry channel"),
+    (r"highest promo discount", "Promo discount"),
+    (r"indian tax resident", "Indian discount"),
+    (r"total payable", "Total Payable"),
+    (r"total paid", "Total paid"),
+    (r"date on which customer made the booking deposit", "Deposit date"),
+    (r"pending payment", "Pending on check-in"),
+    (r"student still to pay", "Still to pay"),
+    (r"payment channel", "Payment channel"),
+    (r"booking in this batch because", "Rebooked"),
+    (r"food special need", "Food special need"),
+    (r"all other comments", "Comments"),
+    (r"(all|batch)$", "Batch"),
+    (r"period$", "Period"),
+]
+_COMPILED_PATTERNS = [(re.compile(pattern), name) for pattern, name in COLUMN_PATTERNS]
+
+# Free-text columns kept as strings (the rest is typed by schema.RYP_STUDENT_SCHEMA)
+TEXT_COLUMNS = ("Name", "Email", "WA number", "Twin with", "Food special need", "Comments", "Period")
+
+# How far down the sheet the header row is searched for
+HEADER_SCAN_ROWS = 20
+
+# Deposit dates such as "20-Sep" or "6-Oct" carry no year
+_YEARLESS_DATE = re.compile(r"^\s*(\d{1,2})[- ]([A-Za-z]+)\s*$")
+
+
+def _normalise_label(value):
+    return " ".join(str(value).split()).lower()
+
+
+def compact_name(label):
+    """Compact column name for a header label, or None if it is not known."""
+    label = _normalise_label(label)
+    for pattern, name in _COMPILED_PATTERNS:
+        if pattern.match(label):
+            return name
+    return None
+
+
+def detect_header(raw):
+    """Return (first, last) row positions of the header band of a sheet read with ``header=None``.
+
+    The header row is the row with the most recognised labels. Rows directly
+    above it that only hold text in otherwise empty columns are treated as a
+    title band, and their labels are joined into the column names.
+    """
+    scores = [
+        sum(compact_name(value) is not None for value in row if pd.notna(value))
+        for row in raw.head(HEADER_SCAN_ROWS).itertuples(index=False)
+    ]
+    if not scores or max(scores) < 3:
+        raise ValueError("No header row found in the student database")
+    header = scores.index(max(scores))
+
+    first = header
+    while first > 0 and scores[first - 1] == 0 and raw.iloc[first - 1].notna().any():
+        first -= 1
+    return first, header
+
+
+def _infer_deposit_years(deposit, batch_start):
+    """Give year-less deposit dates ("20-Sep") the last such date before the batch start."""
+    text = deposit.astype("string")
+    match = text.str.extract(_YEARLESS_DATE)
+    yearless = match[0].notna() & batch_start.notna()
+    if not yearless.any():
+        return deposit
+    year = batch_start.dt.year
+    guess = schema.parse_dates(
+        (match[0] + " " + match[1] + " " + year.astype("string"))[yearless],
+        formats=("%d %b %Y", "%d %B %Y"),
+    )
+    # A deposit is paid before the batch starts: roll back a year otherwise
+    after_start = guess > batch_start[yearless]
+    guess[after_start] = guess[after_start] - pd.DateOffset(years=1)
+    deposit = deposit.astype(object)
+    deposit[guess.index] = guess.dt.strftime("%d %b %Y").where(guess.notna(), deposit[guess.index])
+    return deposit
+
+
+def read_student_database(path):
+    """Read one RYP student database into the compact column layout."""
+    raw = pd.read_excel(path, header=None, dtype=object)
+    first, header = detect_header(raw)
+
+    labels = raw.iloc[first:header + 1].apply(
+        lambda column: " ".join(str(value) for value in column if pd.notna(value))
+    )
+    columns = {}
+    for position, label in enumerate(labels):
+        name = compact_name(label) or compact_name(raw.iat[header, position])
+        if name is not None and name not in columns.values():
+            columns[position] = name
+
+    students = raw.iloc[header + 1:, list(columns)].set_axis(list(columns.values()), axis=1)
+    # Marker and spacer rows have no student name; repeated header rows have the label itself
+    students = students[students["Name"].notna()]
+    students = students[students["Name"].map(compact_name) != "Name"].reset_index(drop=True)
+    for column in TEXT_COLUMNS:
+        if column in students:
+            students[column] = students[column].astype("string").str.strip()
+
+    batch_start = schema.parse_dates(students["Batch start date"])
+    if "Deposit date" in students:
+        students["Deposit date"] = _infer_deposit_years(students["Deposit date"], batch_start)
+
+    # Year and Month of the batch start, so RYP filters like the Bali reports
+    program = "300HR" if "Joined from 200HR" in students else "200HR"
+    students.insert(0, "Category", program)
+    students.insert(1, "Year", batch_start.dt.year)
+    students.insert(2, "Month", batch_start.dt.month_name())
+    return students
+
+
+class StudentDatabase:
+    """Normalised students of one RYP program with their year -> months index."""
+
+    def __init__(self, program, students):
+        self.program = program
+        self.students = students
+        self.months_by_year = build_month_index(students)
+        self.years = list(self.months_by_year)
+
+    def summary(self, selected_year="All", selected_month=None):
+        """Return (students, total payable, total paid, still to pay) for a filter."""
+        students = schema.filter_period(self.students, selected_year, selected_month)
+        return (
+            len(students),
+            float(students["Total Payable"].sum()),
+            float(students["Total paid"].sum()),
+            float(students["Still to pay"].sum()),
+        )
+
+    def counts(self, group_by, selected_year="All", selected_month=None):
+        """Number of students per ``group_by`` value, largest first."""
+        students = schema.filter_period(self.students, selected_year, selected_month)
+        counts = students.groupby(group_by, observed=True, sort=True).size()
+        return counts.sort_values(ascending=False, kind="stable")
+
+
+def source_name(program, location="RYP"):
+    return data_loader.student_sources(location)[program]
+
+
+def get_student_database(program, location="RYP"):
+    """The StudentDatabase of ``program`` at ``location``, read on first use and cached per data version."""
+    name = source_name(program, location)
+    return data_loader.cached(
+        ("students", location, program),
+        data_loader.table_version(name),
+        lambda: StudentDatabase(program, data_loader.load_report_table(name)),
+        ttl=None,
+    )
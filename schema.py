@@ -0,0 +1,270 @@
+"""Column types and normalisation of the report tables.
+
+Applied once when a workbook is ingested, so snapshots and every consumer see
+typed columns (ratios, datetimes, ordered months, categoricals) instead of the
+raw strings read from Excel, and no string work is left for render time.
+"""
+
+import calendar
+import re
+from datetime import date
+
+import pandas as pd
+
+MONTHS = list(calendar.month_name)[1:]
+MONTH_DTYPE = pd.CategoricalDtype(MONTHS, ordered=True)
+
+# Batch dates appear as "12 Jan 2024" (Bali) and "January 26, 2025" (RYP); RYP
+# deposit dates add "13-Aug-2024", "6-November-2024" and "1 November 2024"
+DATE_FORMATS = ("%d %b %Y", "%B %d, %Y", "%d %B %Y", "%d-%b-%Y", "%d-%B-%Y", "%Y-%m-%d")
+
+# Room types named without "Room" ("TWIN", "Private deluxe") get it appended,
+# except for these
+ROOMS_WITHOUT_SUFFIX = ("Villa", "No Accommodation")
+
+# Payment channels as typed in any case ("xendit", "PAypal", "Bank transfer"),
+# and their other names, are read as these spellings
+PAYMENT_CHANNELS = ("Xendit", "PayPal", "Bank Transfer", "Wise", "Stripe", "Tripaneer", "Revolut", "Doku")
+PAYMENT_CHANNEL_ALIASES = {"bank tf": "Bank Transfer"}
+# Payments split over several channels: "Paypal / Xendit", "Tripaneer+xendit",
+# "Bank Transfer // xendit", "Bank Transfer, Xendit"
+PAYMENT_CHANNEL_SPLIT = r"/+|\+|,"
+PAYMENT_CHANNEL_SEPARATOR = " / "
+
+BATCH_DATE_COLUMNS = {"Batch start date": "date", "Batch end date": "date"}
+DIMENSION_COLUMNS = {"Category": "category", "Month": "month", "Site": "category", "Group": "category"}
+
+# Kinds of table every location may have (see manifest.py)
+TABLE_KINDS = ("occupancy", "sales", "students")
+
+# Table kind -> {column: kind}; columns not listed keep the dtype read from Excel
+TABLE_SCHEMAS = {
+    "occupancy": {
+        "No": "int",
+        "Year": "int",
+        **DIMENSION_COLUMNS,
+        **BATCH_DATE_COLUMNS,
+        "Room": "room",
+        "Capacity": "int",
+        "Fill": "int",
+        "Available": "int",
+        "Occupancy": "ratio",
+    },
+    "sales": {
+        "No": "int",
+        "Year": "int",
+        **DIMENSION_COLUMNS,
+        **BATCH_DATE_COLUMNS,
+        "ROOM TYPE": "room",
+        "Payment Channel": "channel",
+        "PAID STATUS": "category",
+        "PRICE": "float",
+        "Disc/ Scholarship": "float",
+        "Additional Fee": "float",
+        "TOTAL AMOUNT": "float",
+        "PAID": "float",
+        "BALANCE": "float",
+    },
+}
+
+# Nullable integer dtype of the "int" columns; other "int" columns (row numbers) are Int32
+INT_DTYPES = {"Year": "Int16", "Capacity": "Int16", "Fill": "Int16", "Available": "Int16", "Batch": "Int16"}
+
+# Columns the dashboard aggregates, per table kind (every other column for kinds
+# not listed). NAME is read only to tell named rows (bookings) apart, see PRESENCE_FLAGS.
+REPORT_COLUMNS = {
+    "sales": [
+        "No", "Category", "Year", "Month", "Batch start date", "Batch end date", "Site", "Group",
+        "NAME", "ROOM TYPE", "Payment Channel", "Disc/ Scholarship", "Additional Fee",
+        "TOTAL AMOUNT", "PAID", "BALANCE", "PAID STATUS",
+    ],
+}
+
+# Personal details and free text, per table kind. They are never aggregated, so the
+# report tables leave them out and they are only read for drill-downs (see
+# data_loader.load_private_table).
+PRIVATE_COLUMNS = {
+    "sales": ("NAME", "WA NUMBER", "EMAIL", "COMMENT"),
+    "students": ("Name", "Email", "WA number", "Twin with", "Food special need", "Comments"),
+}
+
+# Private column -> boolean column kept in the report table in its place
+PRESENCE_FLAGS = {"NAME": "Named"}
+
+# RYP student databases, after ryp.read_student_database renamed their columns
+RYP_STUDENT_SCHEMA = {
+    "Category": "category",
+    "Year": "int",
+    "Month": "month",
+    **BATCH_DATE_COLUMNS,
+    "Batch": "int",
+    "No": "int",
+    "Gender": "category",
+    "Residence Country": "category",
+    "Booking source": "category",
+    "Room type": "category",
+    "Continues to 300HR": "flag",
+    "Joined from 200HR": "flag",
+    "Handling method": "category",
+    "Enquiry channel": "category",
+    "Promo discount": "float",
+    "Indian discount": "flag",
+    "Total Payable": "float",
+    "Total paid": "float",
+    "Deposit date": "date",
+    "Pending on check-in": "float",
+    "Still to pay": "float",
+    "Payment channel": "channel",
+    "Rebooked": "flag",
+    "Period": "category",
+}
+TABLE_SCHEMAS["students"] = RYP_STUDENT_SCHEMA
+
+
+def table_kind(name):
+    """Kind of table ``name``: "<prefix>_sales", "<prefix>_occupancy", else a student database."""
+    suffix = name.rsplit("_", 1)[-1]
+    return suffix if suffix in TABLE_KINDS else "students"
+
+
+def parse_dates(values, formats=DATE_FORMATS):
+    """Parse a column of date strings written in any of ``formats``.
+
+    Only the distinct values are parsed, so the cost depends on the number of
+    batches rather than the number of rows.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    uniques = pd.Series(values.dropna().unique(), dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    # Cells Excel already stored as dates come through as datetime objects
+    is_date = uniques.map(lambda value: isinstance(value, (date, pd.Timestamp)))
+    parsed[is_date] = pd.to_datetime(uniques[is_date].tolist())
+    text = uniques.astype(str).str.strip()
+    for date_format in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=date_format, errors="coerce")
+    lookup = dict(zip(uniques, parsed))
+    return pd.Series(values.map(lookup), index=values.index, dtype="datetime64[ns]")
+
+
+def parse_numbers(values):
+    """Convert numbers that may be stored as text ("$3,300", "83%") to floats."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    text = values.astype(str).str.replace(r"[$,%\s]", "", regex=True)
+    return pd.to_numeric(text.where(values.notna()), errors="coerce").astype(float)
+
+
+def parse_months(values):
+    """Month names ("january", " March ") as the calendar-ordered ``MONTH_DTYPE``."""
+    if values.dtype == MONTH_DTYPE:
+        return values
+    return values.astype("string").str.strip().str.title().astype(MONTH_DTYPE)
+
+
+def parse_rooms(values):
+    """Room types ("TWIN", "Private deluxe", "No-accommodation") as one categorical spelling.
+
+    The sales sheet types room names freely while the occupancy sheet uses
+    "Twin Room", "Private Deluxe Room", ...; both are mapped to the latter so
+    the two tables can be joined per room.
+    """
+    uniques = pd.Series(values.dropna().unique(), dtype=object)
+    names = uniques.astype(str).str.replace("-", " ").str.split().str.join(" ").str.title()
+    suffix = ~names.str.endswith("Room") & ~names.isin(ROOMS_WITHOUT_SUFFIX) & (names != "")
+    names = names.where(~suffix, names + " Room")
+    return values.map(dict(zip(uniques, names))).astype("category")
+
+
+def parse_payment_channels(values):
+    """Payment channels ("xendit", "PAYPAL", "Bank tf") as one categorical spelling each.
+
+    Payments split over several channels ("Paypal / Xendit", "Tripaneer+xendit")
+    have each part read the same way, joined by ``PAYMENT_CHANNEL_SEPARATOR``.
+    Parts that are not a known channel keep their own spelling, without the
+    surrounding blanks.
+    """
+    known = {channel.lower(): channel for channel in PAYMENT_CHANNELS} | PAYMENT_CHANNEL_ALIASES
+
+    def channel(text):
+        parts = (" ".join(part.split()) for part in re.split(PAYMENT_CHANNEL_SPLIT, str(text)))
+        return PAYMENT_CHANNEL_SEPARATOR.join(known.get(part.lower(), part) for part in parts if part)
+
+    uniques = values.dropna().unique()
+    return values.map({value: channel(value) for value in uniques}).astype("category")
+
+
+def parse_flags(values):
+    """Yes/No answers ("Yes", "NO", " no ") as a nullable boolean column."""
+    text = values.astype("string").str.strip().str.lower()
+    return text.map({"yes": True, "y": True, "no": False, "n": False}).astype("boolean")
+
+
+def booked(df):
+    """Rows of a sales report table that are bookings: named, with a PAID STATUS.
+
+    The one rule behind the "Total Booking" KPI, the batch table, the SQL
+    sales table, the batch drill-down and the booking export.
+    """
+    return df["PAID STATUS"].notna() & df["Named"].astype(bool)
+
+
+def filter_period(df, selected_year="All", selected_month=None):
+    """Rows of ``df`` in the selected Year, and Month within it ("All" keeps every row)."""
+    if selected_year != "All":
+        df = df[df["Year"] == selected_year]
+        if selected_month:
+            df = df[df["Month"] == selected_month]
+    return df
+
+
+def report_columns(name):
+    """``REPORT_COLUMNS`` of table ``name``, or None for all of its columns."""
+    return REPORT_COLUMNS.get(table_kind(name))
+
+
+def private_columns(name):
+    return PRIVATE_COLUMNS[table_kind(name)]
+
+
+def coerce(df, name):
+    """Return a copy of ``df`` with the columns of table ``name`` normalised."""
+    df = df.copy()
+    for column, kind in TABLE_SCHEMAS.get(table_kind(name), {}).items():
+        if column not in df:
+            continue
+        if kind == "date":
+            df[column] = parse_dates(df[column])
+        elif kind == "int":
+            df[column] = parse_numbers(df[column]).round().astype(INT_DTYPES.get(column, "Int32"))
+        elif kind == "ratio":
+            # "83%" -> 0.83
+            df[column] = parse_numbers(df[column]) / 100
+        elif kind == "month":
+            df[column] = parse_months(df[column])
+        elif kind == "room":
+            df[column] = parse_rooms(df[column])
+        elif kind == "channel":
+            df[column] = parse_payment_channels(df[column])
+        elif kind == "flag":
+            df[column] = parse_flags(df[column])
+        elif kind == "category":
+            df[column] = df[column].astype("category")
+        else:
+            df[column] = parse_numbers(df[column])
+    return df
+
+
+def without_private(df, name):
+    """``df`` without the ``PRIVATE_COLUMNS`` of table ``name``, flags of ``PRESENCE_FLAGS`` in their place."""
+    private = [column for column in PRIVATE_COLUMNS.get(table_kind(name), ()) if column in df]
+    flags = {PRESENCE_FLAGS[column]: df[column].notna() for column in private if column in PRESENCE_FLAGS}
+    return df.drop(columns=private).assign(**flags)
+
+
+def memory_usage_mb(df):
+    """Deep memory footprint of ``df`` in megabytes."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
@@ -0,0 +1,267 @@
+"""Columnar (Parquet) snapshots of the source workbooks.
+
+Parsing xlsx XML through openpyxl is the slowest part of a cold start. Each
+workbook is converted once into a typed Parquet file under ``SNAPSHOT_DIR``;
+later loads memory-map the snapshot and read only the requested columns. A
+snapshot is stale when the source version or ``SCHEMA_VERSION`` it was built
+from differs, in which case it is rebuilt from Excel.
+
+Tables of the kinds listed in ``ROW_KEYS`` are refreshed incrementally instead: the
+workbook is streamed raw, every row is hashed, and only rows whose key is new or
+whose hash changed are normalised and merged into the previous snapshot. The
+change is reported as a ``Delta`` so aggregates can be updated the same way.
+"""
+
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+import schema
+import workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are an optimisation, Excel still works without them
+    pa = pq = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.environ.get("SALES_REPORT_SNAPSHOT_DIR", os.path.join(BASE_DIR, ".snapshots"))
+
+# Bump whenever schema.coerce produces different columns or dtypes
+SCHEMA_VERSION = "7"
+
+# Table kind -> column identifying a row across edits of the workbook
+ROW_KEYS = {
+    "occupancy": "No",
+    "sales": "No",
+}
+
+_SOURCE_VERSION_KEY = b"sales_report.source_version"
+_SCHEMA_VERSION_KEY = b"sales_report.schema_version"
+
+
+@dataclass(frozen=True)
+class Delta:
+    """Rows of a table that changed between two source versions.
+
+    ``removed`` holds the previous normalised version of every deleted or
+    modified row and ``added`` the new version of every added or modified one.
+    """
+
+    from_version: str
+    to_version: str
+    removed: pd.DataFrame
+    added: pd.DataFrame
+
+
+def row_key(name):
+    """Column identifying the rows of table ``name``, or None if it is always rebuilt in full."""
+    return ROW_KEYS.get(schema.table_kind(name))
+
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.parquet")
+
+
+def row_hashes_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.rows.parquet")
+
+
+def read_excel(name, path, reader=None, columns=None):
+    """Read and normalise a workbook, streamed by ``workbook.read_table``.
+
+    ``reader(path)`` replaces the streaming reader for sheets with another layout.
+    """
+    if reader is None:
+        return workbook.read_table(path, name, columns)
+    df = schema.coerce(reader(path), name)
+    return df[list(columns)] if columns is not None else df
+
+
+def snapshot_source_version(path):
+    """Source version a snapshot file was built from, or None if unusable."""
+    if pq is None:
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if metadata.get(_SCHEMA_VERSION_KEY) != SCHEMA_VERSION.encode():
+        return None
+    version = metadata.get(_SOURCE_VERSION_KEY)
+    return version.decode() if version is not None else None
+
+
+def snapshot_is_fresh(name, version):
+    return version is not None and snapshot_source_version(snapshot_path(name)) == version
+
+
+def _write_parquet(path, df, version):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_SOURCE_VERSION_KEY] = version.encode()
+    metadata[_SCHEMA_VERSION_KEY] = SCHEMA_VERSION.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(name, df, version, row_hashes=None):
+    """Write ``df`` as the snapshot of ``name``, replacing any previous one atomically.
+
+    ``row_hashes`` (key and hash per row) is written next to it for the next
+    incremental refresh.
+    """
+    if row_hashes is not None:
+        _write_parquet(row_hashes_path(name), row_hashes, version)
+    _write_parquet(snapshot_path(name), df, version)
+
+
+def hash_rows(raw, key):
+    """One (key, row hash) pair per row of a raw ``workbook.iter_chunks`` chunk.
+
+    Cells are hashed as text, so a row's hash depends on its cells only and
+    not on the chunk it was read in.
+    """
+    keys = schema.parse_numbers(raw[key]).round().astype("Int64")
+    row_hashes = pd.util.hash_pandas_object(raw.astype(str), index=False)
+    return pd.DataFrame({key: keys.to_numpy(), "row_hash": row_hashes.to_numpy()})
+
+
+def _restore_dtypes(df, like):
+    """Give the merged rows the dtypes of the previous snapshot, or None if they do not fit.
+
+    Concatenating categoricals with different categories, or a delta whose
+    text column happens to be all blank, gives object columns.
+    """
+    for column, dtype in like.dtypes.items():
+        if df[column].dtype == dtype:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype) and not dtype.ordered:
+            dtype = "category"
+        try:
+            df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            return None
+    return df
+
+
+def refresh_snapshot(name, path, version):
+    """Merge the rows of ``path`` that changed since the last snapshot into it.
+
+    Returns ``(df, delta)``, or None when there is no usable previous snapshot
+    (or the workbook layout changed) and the table must be rebuilt in full.
+    """
+    key = row_key(name)
+    previous_version = snapshot_source_version(snapshot_path(name))
+    if previous_version is None or snapshot_source_version(row_hashes_path(name)) != previous_version:
+        return None
+    columns = pq.read_schema(snapshot_path(name)).names
+    old_hashes = pq.read_table(row_hashes_path(name)).to_pandas()
+    # The first load accepts duplicate keys; such a table can only be rebuilt in full
+    if old_hashes[key].isna().any() or not old_hashes[key].is_unique:
+        return None
+    old_pairs = pd.MultiIndex.from_frame(old_hashes[[key, "row_hash"]])
+
+    # Stream the sheet and keep (raw) only the rows whose (key, hash) pair is new
+    chunk_hashes = []
+    changed_rows = []
+    for raw in workbook.iter_chunks(path):
+        if list(raw.columns) != columns:
+            return None
+        hashes = hash_rows(raw, key)
+        known = pd.MultiIndex.from_frame(hashes).isin(old_pairs)
+        chunk_hashes.append(hashes)
+        changed_rows.append(raw[~known])
+    hashes = pd.concat(chunk_hashes, ignore_index=True)
+    if hashes[key].isna().any() or not hashes[key].is_unique:
+        return None
+    previous = read_snapshot(name)
+    if not previous[key].is_unique:
+        return None
+    removed_keys = old_hashes[key][~old_hashes[key].isin(hashes[key])]
+
+    # Only the delta goes through normalisation
+    added = workbook.normalise_chunk(pd.concat(changed_rows, ignore_index=True), name)
+    stale = previous[key].isin(removed_keys) | previous[key].isin(added[key])
+    removed = previous[stale]
+
+    kept = previous[~stale].set_index(previous[key][~stale].to_numpy(dtype="int64"))
+    rows = pd.concat([kept, added.set_index(added[key].to_numpy(dtype="int64"))])
+    df = _restore_dtypes(rows.loc[hashes[key].to_numpy(dtype="int64")].reset_index(drop=True), previous)
+    if df is None:
+        return None
+
+    write_snapshot(name, df, version, row_hashes=hashes)
+    return df, Delta(previous_version, version, removed.reset_index(drop=True), added.reset_index(drop=True))
+
+
+def read_snapshot(name, columns=None):
+    if columns is not None:
+        columns = list(columns)
+    table = pq.read_table(snapshot_path(name), columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def read_version(name, version, columns=None):
+    """The snapshot of ``name`` if it was built from ``version``, else None.
+
+    The version is checked on the file actually read, so a snapshot replaced
+    in the meantime is never taken for the one asked for.
+    """
+    if not snapshot_is_fresh(name, version):
+        return None
+    try:
+        table = pq.read_table(snapshot_path(name), columns=None if columns is None else list(columns), memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(_SCHEMA_VERSION_KEY) != SCHEMA_VERSION.encode() or metadata.get(_SOURCE_VERSION_KEY) != version.encode():
+        return None
+    return table.to_pandas()
+
+
+def build_snapshot(name, path, version, reader=None):
+    if row_key(name) and reader is None:
+        chunks = []
+        chunk_hashes = []
+        for raw in workbook.iter_chunks(path):
+            chunks.append(workbook.normalise_chunk(raw, name))
+            chunk_hashes.append(hash_rows(raw, row_key(name)))
+        df = workbook.concat_chunks(chunks)
+        row_hashes = pd.concat(chunk_hashes, ignore_index=True)
+    else:
+        df = read_excel(name, path, reader)
+        row_hashes = None
+    write_snapshot(name, df, version, row_hashes)
+    return df
+
+
+def load(name, path, version, columns=None, reader=None, on_delta=None):
+    """Load table ``name`` from its snapshot, refreshing it from ``path`` when stale.
+
+    ``version`` identifies the content of ``path``; without one (or without
+    pyarrow) only the requested columns are streamed and nothing is written. Tables with a ``row_key`` are
+    refreshed incrementally when possible, and ``on_delta(delta)`` is then
+    called with the rows that changed.
+    """
+    if pq is None or version is None:
+        # No snapshot to keep: stream just the requested columns
+        return read_excel(name, path, reader, columns)
+    if snapshot_is_fresh(name, version):
+        return read_snapshot(name, columns)
+    refreshed = None
+    if row_key(name) and reader is None:
+        refreshed = refresh_snapshot(name, path, version)
+    if refreshed is not None:
+        df, delta = refreshed
+        if on_delta is not None:
+            on_delta(delta)
+    else:
+        df = build_snapshot(name, path, version, reader)
+    return df[list(columns)] if columns is not None else df
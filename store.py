@@ -0,0 +1,60 @@
+"""On-disk store of precomputed report datasets.
+
+``precompute.py`` computes the datasets of every Location x Program x Year x
+Month x View permutation and writes them, with the versions of the sources
+they were computed from, to one pickle file. Pages then take their datasets
+from the store while those sources are unchanged, and compute them as usual
+otherwise (or when there is no store).
+"""
+
+import os
+import pickle
+
+import data_loader
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.environ.get("SALES_REPORT_STORE", os.path.join(BASE_DIR, ".precomputed", "reports.pickle"))
+
+# Bump whenever the layout of the store or of its datasets changes
+STORE_FORMAT = "1"
+
+
+def store_key(report, view, selected_year="All", selected_month=None):
+    return (report.location, report.program, view, selected_year, selected_month if selected_year != "All" else None)
+
+
+def write_store(entries, versions, path=STORE_PATH):
+    """Write {store_key: {dataset: value}} computed from ``versions``, replacing the store atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as store_file:
+        pickle.dump({"format": STORE_FORMAT, "versions": versions, "entries": entries}, store_file, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    with open(path, "rb") as store_file:
+        store = pickle.load(store_file)
+    return store if store.get("format") == STORE_FORMAT else None
+
+
+def read_store(path=STORE_PATH):
+    """The store at ``path`` (read once per file version), or None if there is none."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return data_loader.cached(("store", path), f"{stat.st_mtime_ns:x}-{stat.st_size:x}", lambda: _read(path), ttl=None)
+
+
+def lookup(report, view, selected_year="All", selected_month=None):
+    """Precomputed {dataset: value} of one page, or None if missing or out of date."""
+    store = read_store()
+    if store is None:
+        return None
+    entry = store["entries"].get(store_key(report, view, selected_year, selected_month))
+    if entry is None:
+        return None
+    if any(store["versions"].get(name) != data_loader.source_version(name) for name in report.sources):
+        return None
+    return entry
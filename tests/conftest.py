@@ -0,0 +1,20 @@
+"""Test setup: the modules live at the repository root, and every test
+session works on its own copy of the workbooks and snapshot directory."""
+
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read by the modules on import, so set before any test imports them
+_session_dir = tempfile.mkdtemp(prefix="sales-report-tests-")
+for _directory in ("Bali data", "RYP data"):
+    shutil.copytree(os.path.join(ROOT, _directory), os.path.join(_session_dir, "data", _directory))
+os.environ["SALES_REPORT_DATA_DIR"] = os.path.join(_session_dir, "data")
+os.environ["SALES_REPORT_SNAPSHOT_DIR"] = os.path.join(_session_dir, "snapshots")
+os.environ["SALES_REPORT_STORE"] = os.path.join(_session_dir, "reports.pickle")
+os.environ["SALES_REPORT_REFRESH_INTERVAL"] = "0"
+os.environ["SALES_REPORT_INGEST_WORKERS"] = "1"
@@ -0,0 +1,52 @@
+import os
+
+import openpyxl
+import pytest
+
+import data_loader
+import precompute
+import refresher
+from cube import get_cube
+
+
+def edit_paid(name, value):
+    path = data_loader.local_source(name)
+    book = openpyxl.load_workbook(path)
+    sheet = book.worksheets[0]
+    header = [cell.value for cell in sheet[1]]
+    sheet.cell(row=2, column=header.index("PAID") + 1).value = value
+    book.save(path)
+    # Make sure the edit is seen as a new version even within one mtime tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def paid_totals():
+    """PAID of the report table and of the cube, as a page reads them."""
+    return float(data_loader.load_report_table("bali_sales")["PAID"].sum()), float(get_cube("Bali").sales["PAID"].sum())
+
+
+def failing_warm_up():
+    # Half-way through a refresh: the tables are built, the aggregates are not
+    for name in data_loader.SOURCES:
+        data_loader.load_report_table(name)
+    raise RuntimeError("warm-up failed")
+
+
+def test_failed_refresh_keeps_published_data(monkeypatch):
+    refresher.refresh()
+    table, cube = paid_totals()
+    assert table == pytest.approx(cube)
+
+    edit_paid("bali_sales", "999999")
+    with monkeypatch.context() as patch:
+        patch.setattr(precompute, "warm_up", failing_warm_up)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                refresher.refresh()
+            assert paid_totals() == pytest.approx((table, cube))
+
+    assert refresher.refresh() is not None
+    new_table, new_cube = paid_totals()
+    assert new_table == pytest.approx(new_cube)
+    assert new_table != pytest.approx(table)
@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import schema
+import snapshot
+from conftest import ROOT
+from cube import ReportCube
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    return tmp_path
+
+
+def copy_workbook(tmp_path, name, relative):
+    path = str(tmp_path / f"{name}.xlsx")
+    shutil.copy(os.path.join(ROOT, relative), path)
+    return path
+
+
+def edit_workbook(path, edit):
+    book = openpyxl.load_workbook(path)
+    edit(book.worksheets[0])
+    book.save(path)
+
+
+def report_table(df, name):
+    return schema.without_private(df, name)
+
+
+def test_refresh_matches_full_rebuild(snapshot_dir):
+    name = "bali_sales"
+    path = copy_workbook(snapshot_dir, name, "Bali data/bali_sales.xlsx")
+    first = snapshot.build_snapshot(name, path, "v1")
+
+    def edit(sheet):
+        header = [cell.value for cell in sheet[1]]
+        paid = header.index("PAID") + 1
+        sheet.cell(row=5, column=paid).value = "1999"
+        appended = [cell.value for cell in sheet[3]]
+        appended[header.index("No")] = str(sheet.max_row + 100)
+        sheet.append(appended)
+        sheet.delete_rows(10)
+
+    edit_workbook(path, edit)
+    refreshed = snapshot.refresh_snapshot(name, path, "v2")
+    assert refreshed is not None
+    merged, delta = refreshed
+    rebuilt = snapshot.read_excel(name, path)
+
+    pd.testing.assert_frame_equal(merged, rebuilt, check_categorical=False)
+    assert snapshot.snapshot_is_fresh(name, "v2")
+    assert (len(delta.removed), len(delta.added)) == (2, 2)
+
+    occupancy = snapshot.read_excel("bali_occupancy", os.path.join(ROOT, "Bali data/bali_occupancy.xlsx"))
+    updated = ReportCube.from_tables(occupancy, report_table(first, name)).updated(
+        [], [snapshot.Delta(delta.from_version, delta.to_version,
+                            report_table(delta.removed, name), report_table(delta.added, name))]
+    )
+    expected = ReportCube.from_tables(occupancy, report_table(rebuilt, name))
+    grain = ["Category", "Year", "Month", "Site", "Room"]
+
+    def ordered(cube):
+        cube = cube.astype({column: str for column in grain})
+        return cube.sort_values(grain).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(ordered(updated.sales), ordered(expected.sales))
+
+
+def test_duplicate_keys_rebuild_in_full(snapshot_dir):
+    name = "bali_occupancy"
+    path = copy_workbook(snapshot_dir, name, "Bali data/bali_occupancy.xlsx")
+    edit_workbook(path, lambda sheet: sheet.append([cell.value for cell in sheet[2]]))
+    first = snapshot.load(name, path, "v1")
+
+    def edit(sheet):
+        header = [cell.value for cell in sheet[1]]
+        sheet.cell(row=3, column=header.index("Fill") + 1).value = "0"
+
+    edit_workbook(path, edit)
+    assert snapshot.refresh_snapshot(name, path, "v2") is None
+    second = snapshot.load(name, path, "v2")
+    assert len(second) == len(first)
+    pd.testing.assert_frame_equal(second, snapshot.read_excel(name, path), check_categorical=False)
@@ -0,0 +1,426 @@
+"""Streamlit rendering of the report pages.
+
+A single renderer serves every entry of ``reports.REGISTRY``: it asks for the
+year, month and view, then hands over to the renderer of the chosen view.
+
+A page is a chain of stages (year list -> month list -> view data -> figures).
+Each stage is kept in ``st.session_state`` with the inputs it was computed
+from, so a rerun only recomputes the stages downstream of the widget that
+changed. The view radio and the view itself run as a fragment: switching
+views, or changing a widget inside a view, reruns only that fragment.
+"""
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+import export
+import metrics
+import refresher
+from data_loader import current_version
+from figures import FIGURE_CACHE, bar_figure, cached_figure, grouped_bar_figure, heatmap_figure, line_figure
+from reports import (
+    STUDENT_GROUPS,
+    get_batch_bookings,
+    get_batches,
+    get_period,
+    get_report,
+    get_sorted_months_for_year,
+    get_unique_years,
+    view_data,
+)
+
+KPI_BLOCK = """
+        <div style='text-align: left;'>
+            <div style='font-size: 16px; color: #333333;'>{label}</div>
+            <div style='font-size: 48px; color: #3D3D3D;'>{value}</div>
+            <div style='color: #202fb2; font-size: 18px;'>{caption}</div>
+        </div>"""
+
+
+def render_kpis(*kpis):
+    """Render (label, formatted value, caption) tuples side by side."""
+    blocks = "".join(KPI_BLOCK.format(label=label, value=value, caption=caption) for label, value, caption in kpis)
+    st.markdown(
+        f"""
+    <div style='display: flex; justify-content: center; gap: 50px; padding: 20px;'>{blocks}
+    </div>
+""",
+        unsafe_allow_html=True,
+    )
+
+
+def stage(name, inputs, compute):
+    """Value of page stage ``name``, recomputed only when its ``inputs`` change."""
+    state_key = f"stage:{name}"
+    held = st.session_state.get(state_key)
+    if held is not None and held[0] == inputs:
+        return held[1]
+    value = compute()
+    st.session_state[state_key] = (inputs, value)
+    return value
+
+
+def page_data(report, view, year, month):
+    """The ``reports.view_data`` object of a view, shared by the reruns of the same filter.
+
+    Its datasets are cached properties, so what one rerun computed is reused by the next.
+    """
+    inputs = (report, view, year, month, current_version(report.sources))
+    return stage("data", inputs, lambda: view_data(report, view, year, month))
+
+
+def plot(key, builder, version=None):
+    """Show the cached figure of ``key`` (location, program, filter state, chart id).
+
+    Figures are cached by the data version of the report's sources; see ``figures.cached_figure``.
+    """
+    if version is None:
+        version = current_version(get_report(*key[:2]).sources)
+    figure = cached_figure(key, builder, version)
+    with metrics.span(f"plotly_chart:{key[-1]}"):
+        st.plotly_chart(figure)
+
+
+def render_overview(report, year, month):
+    overview = page_data(report, "Overview", year, month)
+    filter_key = (report.location, report.program, year, overview.selected_month)
+
+    sales_summary_count, total_amount_paid, occupancy_mean = overview.summary
+    render_kpis(
+        ("Total Booking", sales_summary_count, "Students"),
+        ("Total Amount Paid", f"${total_amount_paid:,.2f}", "In USD (equiv)"),
+        ("Occupancy", f"{occupancy_mean:.2%}", "Occupancy Rate"),
+    )
+
+    # Site dan Room favorit berdasarkan jumlah 'Fill' untuk filter yang dipilih
+    plot(
+        (*filter_key, "top_sites"),
+        lambda: bar_figure(overview.site_counts, "Site", "Count", "Top Sites"),
+    )
+    plot(
+        (*filter_key, "top_rooms"),
+        lambda: bar_figure(overview.room_counts, "Room", "Total Fill", "Top Rooms"),
+    )
+
+    # Total Fill per bulan hanya tergantung tahun, jadi bulan tidak masuk key
+    plot(
+        (report.location, report.program, year, None, "total_fill_by_month"),
+        lambda: bar_figure(overview.month_counts, "Month", "Total Fill", "Total Fill"),
+    )
+
+
+def render_location(report, year, month):
+    location = page_data(report, "Location", year, month)
+    month = location.selected_month
+    table = location.table
+    if table.empty:
+        st.info("No rooms booked for the selected period.")
+        return
+
+    total_capacity = table["Capacity"].sum()
+    total_fill = table["Fill"].sum()
+    render_kpis(
+        ("Utilisation", f"{total_fill / total_capacity:.2%}" if total_capacity else "-", "Fill / Capacity"),
+        ("Unsold Beds", int(table["Available"].sum()), "Available"),
+        ("Revenue per Bed", f"${table['PAID'].sum() / total_fill:,.2f}" if total_fill else "-", "Amount Paid / Fill"),
+    )
+
+    # Utilisasi per Site per bulan hanya tergantung tahun, jadi bulan tidak masuk key
+    plot(
+        (report.location, report.program, year, None, "site_utilisation"),
+        lambda: line_figure(location.utilisation, "Month", "Utilisation", "Utilisation per Site", percent=True),
+    )
+    plot(
+        (report.location, report.program, year, month, "unsold_beds"),
+        lambda: grouped_bar_figure(
+            table.pivot_table(index="Site", columns="Room", values="Available", aggfunc="sum").reset_index(),
+            "Site", sorted(table.loc[table["Available"].notna(), "Room"].unique()), "Unsold Beds", "Unsold Beds per Room",
+        ),
+    )
+    st.dataframe(
+        table.rename(columns={"PAID": "Amount Paid", "Available": "Unsold"}),
+        hide_index=True,
+        column_config={
+            "Utilisation": st.column_config.NumberColumn(format="percent"),
+            "Amount Paid": st.column_config.NumberColumn(format="dollar"),
+            "Revenue per bed": st.column_config.NumberColumn("Revenue per Bed", format="dollar"),
+        },
+    )
+
+
+def batch_labels(batches):
+    """Readable batch names: "12 Jan 2024 · The Mansion (Hanuman)"."""
+    labels = batches["Batch start date"].dt.strftime("%d %b %Y") + " · " + batches["Site"].astype(str)
+    group = batches["Group"].astype(object)
+    return labels.where(group.isna(), labels + " (" + group.astype(str) + ")")
+
+
+def render_batches(report, year, month):
+    default_start, default_end = get_period(year, month, report.location)
+    if default_start is None:
+        st.info("No batches available.")
+        return
+
+    picked = st.date_input(
+        "Batches running between:",
+        value=(default_start.date(), default_end.date()),
+        key=f"batch_range_{report.location}_{report.program}_{year}_{month}",
+    )
+    if len(picked) != 2:
+        return  # the second date has not been picked yet
+    start, end = picked
+
+    batches = get_batches(report.category, start, end, report.location)
+    if batches.empty:
+        st.info("No batches run in the selected dates.")
+        return
+    batches = batches.assign(Batch=batch_labels(batches))
+
+    total_capacity = batches["Capacity"].sum()
+    render_kpis(
+        ("Batches", len(batches), "Running"),
+        ("Fill Rate", f"{batches['Fill'].sum() / total_capacity:.2%}" if total_capacity else "-", "Fill / Capacity"),
+        ("Total Amount Paid", f"${batches['PAID'].sum():,.2f}", "In USD (equiv)"),
+    )
+
+    filter_key = (report.location, report.program, str(start), str(end))
+    plot(
+        (*filter_key, "batch_fill"),
+        lambda: grouped_bar_figure(batches, "Batch", ["Capacity", "Fill"], "Beds", "Fill vs Capacity per Batch"),
+    )
+    plot(
+        (*filter_key, "batch_revenue"),
+        lambda: bar_figure(batches.set_index("Batch")["PAID"], "Batch", "Amount Paid (USD)", "Revenue per Batch"),
+    )
+    st.dataframe(
+        batches[["Batch", "Batch end date", "Capacity", "Fill", "Utilisation", "bookings", "PAID", "balance"]].rename(
+            columns={"bookings": "Bookings", "PAID": "Amount Paid", "balance": "Balance"}
+        ),
+        hide_index=True,
+        column_config={
+            "Batch end date": st.column_config.DateColumn("Ends", format="DD MMM YYYY"),
+            "Utilisation": st.column_config.NumberColumn(format="percent"),
+            "Amount Paid": st.column_config.NumberColumn(format="dollar"),
+            "Balance": st.column_config.NumberColumn(format="dollar"),
+        },
+    )
+
+    # Names are personal details: read from their own table only when a batch is picked
+    with st.expander("Bookings of a batch"):
+        picked = st.selectbox("Batch:", batches["Batch"], index=None, key=f"batch_bookings_{report.location}_{report.program}")
+        if picked is not None:
+            batch = batches[batches["Batch"] == picked].iloc[0]
+            st.dataframe(
+                get_batch_bookings(
+                    report.category, batch["Site"], batch["Batch start date"], batch["Batch end date"], report.location
+                )
+                .rename(columns={"NAME": "Name", "ROOM TYPE": "Room", "PAID": "Amount Paid", "BALANCE": "Balance"}),
+                hide_index=True,
+                column_config={
+                    "Amount Paid": st.column_config.NumberColumn(format="dollar"),
+                    "Balance": st.column_config.NumberColumn(format="dollar"),
+                },
+            )
+
+
+def render_calendar(report, year, month):
+    calendar = page_data(report, "Calendar", year, month)
+    fill, capacity = calendar.nights
+    if fill.empty:
+        st.info("No beds booked for the selected period.")
+        return
+
+    beds_per_night = fill.sum()
+    bed_nights, offered = int(beds_per_night.sum()), int(capacity.to_numpy().sum())
+    render_kpis(
+        ("Bed-nights", f"{bed_nights:,}", "Sold"),
+        ("Utilisation", f"{bed_nights / offered:.2%}" if offered else "-", "Bed-nights sold / offered"),
+        ("Peak Night", int(beds_per_night.max()), beds_per_night.idxmax().strftime("%d %b %Y")),
+    )
+
+    # Utilisasi per malam untuk setiap Site dan Room (baris tanpa kapasitas tetap kosong)
+    plot(
+        (report.location, report.program, year, calendar.selected_month, "night_utilisation"),
+        lambda: heatmap_figure(
+            (fill / capacity.where(capacity > 0)).set_axis(
+                [f"{site} · {room}" for site, room in fill.index], axis=0
+            ),
+            "Night", "Site · Room", "Bed Utilisation per Night", percent=True,
+        ),
+    )
+
+
+STUDENT_CHART_TITLES = {
+    "Room type": "Students by Room Type",
+    "Booking source": "Students by Booking Source",
+    "Residence Country": "Students by Residence Country",
+}
+
+
+def render_student_overview(report, year, month):
+    overview = page_data(report, "Overview", year, month)
+    filter_key = (report.location, report.program, year, overview.selected_month)
+
+    students, total_payable, total_paid, still_to_pay = overview.summary
+    render_kpis(
+        ("Total Booking", students, "Students"),
+        ("Total Payable", f"${total_payable:,.2f}", "In USD (equiv)"),
+        ("Total Paid", f"${total_paid:,.2f}", "In USD (equiv)"),
+        ("Still to Pay", f"${still_to_pay:,.2f}", "In USD (equiv)"),
+    )
+
+    for column in STUDENT_GROUPS:
+        title = STUDENT_CHART_TITLES[column]
+        plot(
+            (*filter_key, column),
+            lambda column=column, title=title: bar_figure(overview.counts(column), column, "Students", title),
+            version=overview.version,
+        )
+
+
+def render_conversion(report, year, month):
+    conversion = page_data(report, "Conversion", year, month)
+    filter_key = (report.location, report.program, year, conversion.selected_month)
+
+    students, converted, rate, paid_per_converted = conversion.summary
+    if not students:
+        st.info("No 200HR students for this selection.")
+        return
+    render_kpis(
+        ("200HR Students", students, "Students"),
+        ("Went on to 300HR", converted, "Students"),
+        ("Conversion", f"{rate:.2%}", "Conversion Rate"),
+        ("300HR Paid", f"${paid_per_converted:,.2f}" if converted else "-", "Per converted student"),
+    )
+
+    # Per angkatan 200HR untuk seluruh tahun terpilih, jadi bulan tidak masuk key
+    by_cohort = conversion.by_cohort
+    plot(
+        (report.location, report.program, year, None, "conversion_by_cohort"),
+        lambda: bar_figure(by_cohort["rate"].round(4), "Cohort", "Conversion Rate", "Conversion to 300HR by 200HR Cohort"),
+        version=conversion.version,
+    )
+    plot(
+        (report.location, report.program, year, None, "converted_by_cohort"),
+        lambda: grouped_bar_figure(
+            by_cohort.rename(columns={"intended": "Intended", "converted": "Enrolled"}).reset_index(),
+            "Cohort", ["Intended", "Enrolled"], "Students", "300HR: Intended vs. Enrolled",
+        ),
+        version=conversion.version,
+    )
+
+
+# (dataset, view) -> renderer; see reports.ProgramReport
+VIEW_RENDERERS = {
+    ("bookings", "Overview"): render_overview,
+    ("bookings", "Location"): render_location,
+    ("bookings", "Batch"): render_batches,
+    ("bookings", "Calendar"): render_calendar,
+    ("students", "Overview"): render_student_overview,
+    ("students", "Conversion"): render_conversion,
+}
+
+
+def render_export(report, view, year, month):
+    """Download of the rows and aggregates behind a view (see ``export.EXPORTS``)."""
+    exports = export.EXPORTS.get((report.dataset, view))
+    if not exports:
+        return
+    with st.expander("Export"):
+        name = st.selectbox("Data:", list(exports))
+        file_format = st.radio("Format:", list(export.FORMATS), horizontal=True)
+        # Built only when the button is clicked
+        st.download_button(
+            "Download",
+            data=lambda: export.export_bytes(report, view, name, file_format, year, month),
+            file_name=export.file_name(report, view, name, file_format, year, month),
+            mime=export.FORMATS[file_format][1],
+            on_click="ignore",
+        )
+
+
+def render_debug_panel(spans):
+    """Timings of this render and the process metrics, when ``metrics.ENABLED``."""
+    span_totals, counters, gauges = metrics.snapshot()
+    with st.expander("Debug: render metrics"):
+        st.caption("This render")
+        st.dataframe(
+            pd.DataFrame(spans, columns=["Span", "Seconds"]),
+            hide_index=True,
+            column_config={"Seconds": st.column_config.NumberColumn(format="%.4f")},
+        )
+        st.caption("Process totals")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, calls, seconds) for name, (calls, seconds) in sorted(span_totals.items())],
+                columns=["Span", "Calls", "Seconds"],
+            ),
+            hide_index=True,
+            column_config={"Seconds": st.column_config.NumberColumn(format="%.4f")},
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [(name, dict(labels), value) for (name, labels), value in sorted(counters.items())]
+                + [(name, dict(labels), value) for (name, labels), value in sorted(gauges.items())],
+                columns=["Metric", "Labels", "Value"],
+            ).astype({"Labels": str}),
+            hide_index=True,
+        )
+        st.json(FIGURE_CACHE.stats())
+
+
+def render_data_status(report):
+    """Data version and last background refresh, in the sidebar."""
+    refreshed = refresher.last_refresh()
+    if refreshed is None:
+        names = report.sources
+        version = refresher.version_digest(dict(zip(names, current_version(names).split("|"))))
+        st.sidebar.caption(f"Data version {version} (loaded on demand)")
+        return
+    st.sidebar.caption(f"Data version {refreshed.version} (refresh #{refreshed.number})")
+    published_at = time.strftime("%d %b %H:%M:%S", time.localtime(refreshed.published_at))
+    st.sidebar.caption(f"Last refresh {published_at}, took {refreshed.seconds:.2f}s")
+
+
+def render_report(report):
+    """Render the page of one ``reports.ProgramReport``, timed when ``metrics.ENABLED``."""
+    metrics.serve()
+    metrics.begin_render()
+    try:
+        render_page(report)
+    finally:
+        spans = metrics.end_render(location=report.location, program=report.program)
+    if metrics.ENABLED:
+        render_debug_panel(spans)
+
+
+def render_page(report):
+    if not report.views:
+        st.write(f"Displaying content for {report.location} - {report.program}")
+        return
+
+    # Year Selection, then Month Selection if a specific year (not "All") is selected
+    version = current_version(report.sources)
+    years = stage("years", (report, version), lambda: get_unique_years(report))
+    year = st.selectbox("Choose Year:", ["All"] + years)
+    month = None
+    if year != "All":
+        months = stage("months", (report, year, version), lambda: get_sorted_months_for_year(year, report))
+        month = st.selectbox("Choose Month:", months)
+        if not month:
+            return
+
+    render_view(report, year, month)
+
+
+@st.fragment
+def render_view(report, year, month):
+    view_option = st.radio("Choose View:", list(report.views))
+    renderer = VIEW_RENDERERS.get((report.dataset, view_option))
+    if renderer is None:
+        st.info(f"The {view_option} view is not available yet.")
+        return
+    renderer(report, year, month)
+    render_export(report, view_option, year, month)
@@ -0,0 +1,95 @@
+"""Streaming, read-only reader for the flat report workbooks.
+
+``pd.read_excel`` materialises every cell of the sheet as Python objects in
+one object-dtype DataFrame before anything is typed. Here the first sheet is
+iterated row by row in openpyxl's read-only mode, only the requested columns
+are kept, and every ``CHUNK_ROWS`` rows the chunk is normalised by
+``schema.coerce`` into typed arrays. Peak memory is therefore one raw chunk
+plus the typed result, whatever the length of the sheet.
+
+Cells are kept as Excel stored them: columns without a kind in
+``schema.TABLE_SCHEMAS`` become text, so a column's dtype never depends on how
+the rows happened to be chunked.
+"""
+
+import os
+
+import pandas as pd
+
+import schema
+
+CHUNK_ROWS = int(os.environ.get("SALES_REPORT_CHUNK_ROWS", 10_000))
+
+# Read as missing, as pd.read_excel does ("#REF!" cells, empty strings); the
+# error codes are openpyxl.cell.cell.ERROR_CODES, spelled out so importing this
+# module does not import openpyxl when every table comes from a snapshot
+MISSING_VALUES = frozenset(("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A", ""))
+
+
+def _header_names(header):
+    return [str(value).strip() if value is not None else f"Unnamed: {position}" for position, value in enumerate(header)]
+
+
+def iter_chunks(path, columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield the raw rows of the first sheet as object-dtype DataFrames of ``chunk_rows`` rows.
+
+    The first row is the header; fully blank rows are skipped and error
+    cells read as missing, like ``pd.read_excel`` does. ``columns``
+    restricts the chunks to a projection.
+    """
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = book.worksheets[0].iter_rows(values_only=True)
+        names = _header_names(next(rows, ()))
+        if columns is None:
+            columns = names
+        missing = [column for column in columns if column not in names]
+        if missing:
+            raise KeyError(f"Columns not in {os.path.basename(path)}: {missing}")
+        positions = [names.index(column) for column in columns]
+
+        buffer = []
+        chunks = 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            values = [row[position] if position < len(row) else None for position in positions]
+            buffer.append([None if value in MISSING_VALUES else value for value in values])
+            if len(buffer) == chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns, dtype=object)
+                chunks += 1
+                buffer = []
+        if buffer or not chunks:
+            yield pd.DataFrame(buffer, columns=columns, dtype=object)
+    finally:
+        book.close()
+
+
+def normalise_chunk(raw, name):
+    """Type one raw chunk: schema kinds where known, text for the other columns."""
+    typed = schema.coerce(raw, name)
+    for column in typed.columns:
+        if typed[column].dtype == object:
+            typed[column] = typed[column].astype("str")
+    return typed
+
+
+def concat_chunks(chunks):
+    """Concatenate typed chunks, merging the categories of categorical columns."""
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for column in chunks[0].columns:
+        parts = [chunk[column] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) and not part.dtype.ordered for part in parts):
+            columns[column] = pd.Series(pd.api.types.union_categoricals(parts, sort_categories=True), name=column)
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_table(path, name, columns=None, chunk_rows=CHUNK_ROWS):
+    """Read the first sheet of ``path`` as table ``name``, typed and projected to ``columns``."""
+    return concat_chunks([normalise_chunk(raw, name) for raw in iter_chunks(path, columns, chunk_rows)])